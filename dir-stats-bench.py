@@ -0,0 +1,607 @@
+#!/usr/bin/python
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# This script benchmarks the dir-stats scripts on synthetic directory
+# trees and reports.
+#
+# ARGUMENTS
+# =========
+# Please call the script with '-h' for an usage message explaining all
+# options and arguments.
+#
+# HOW IT WORKS
+# ============
+# The script creates a deterministic directory tree in a temporary
+# directory (or uses an existing one) and walks it with both traversal
+# engines of dirstats.scan: the scandir() based one and the os.listdir()
+# based fallback. For every engine the number of directory listings and
+# stat() calls as well as the best wall-clock time of several runs is
+# printed to stdout. Optionally the threaded scan of dirstats.scan is
+# timed with an increasing number of threads.
+# With '-S' every stage of the pipeline is run as a separate process:
+# dir-stats.py on the tree, dir-stats-summary.py and
+# dir-stats-ini2html.py on the INI report and dir-stats-htmlmarker.py on
+# the HTML report. The INI report is either the one created by the scan
+# or a synthetic report of any size ('-R'). For every stage the best
+# wall-clock time and the peak memory of the process are recorded.
+# All results can be written to a JSON file ('-o') and compared to the
+# results of an earlier run ('-c').
+#
+# The synthetic tree and report are deterministic: the same options
+# always create the same files with the same sizes. The tree is created
+# in /dev/shm if it exists, so the benchmark does not measure the disk.
+#
+# HISTORY
+# =======
+# 2026-Oct-18 rbrt-weiler
+#   * Added generators for trees with a configurable extension mix and
+#     size distribution and for INI reports of any size.
+#   * Added option '-S' to benchmark all stages of the pipeline, and
+#     options '-o' and '-c' to save and compare results as JSON.
+#   * The traversal engines are taken from dirstats.scan instead of
+#     loading dir-stats.py as a module.
+#   * Released the script as v1.1.0.
+# 2026-Oct-18 rbrt-weiler
+#   * Created the script.
+#   * Released the script as v1.0.0.
+#
+
+import getopt
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from dirstats import scan
+
+#####################################################################
+
+SCRIPT_VERSION = '1.1.0'
+
+opt_depth = 3
+opt_fanout = 5
+opt_files = 50
+opt_runs = 3
+opt_jobs = 1
+opt_keep = 0
+opt_extensions = [ ('avi', 1), ('mpg', 1), ('jpg', 1), ('txt', 1),
+        ('log', 1), ('tar', 1), ('', 1) ]
+opt_sizes = ('uniform', 4096.0)
+opt_tmpdir = None
+opt_report = 0
+opt_stages = 0
+opt_output = None
+opt_compare = None
+
+results = { }
+
+#####################################################################
+
+def main():
+    global opt_depth, opt_fanout, opt_files, opt_runs, opt_jobs, \
+            opt_keep, opt_extensions, opt_sizes, opt_tmpdir, opt_report, \
+            opt_stages, opt_output, opt_compare
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hd:n:f:r:j:kx:z:T:R:So:c:',
+                [ 'help', 'version', 'depth=', 'fanout=', 'files=',
+                'runs=', 'jobs=', 'keep', 'extensions=', 'sizes=',
+                'tmpdir=', 'report=', 'stages', 'output=', 'compare=' ])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(1)
+
+    try:
+        for o, a in opts:
+            if o in ('-h', '--help'):
+                usage()
+                sys.exit(0)
+            if o in ('--version', ):
+                printVersion()
+                sys.exit(0)
+            if o in ('-d', '--depth'):
+                opt_depth = int(a)
+            if o in ('-n', '--fanout'):
+                opt_fanout = int(a)
+            if o in ('-f', '--files'):
+                opt_files = int(a)
+            if o in ('-r', '--runs'):
+                opt_runs = int(a)
+            if o in ('-j', '--jobs'):
+                opt_jobs = int(a)
+            if o in ('-k', '--keep'):
+                opt_keep = 1
+            if o in ('-x', '--extensions'):
+                opt_extensions = parseExtensions(a)
+            if o in ('-z', '--sizes'):
+                opt_sizes = parseSizes(a)
+            if o in ('-T', '--tmpdir'):
+                opt_tmpdir = a
+            if o in ('-R', '--report'):
+                opt_report = int(a)
+            if o in ('-S', '--stages'):
+                opt_stages = 1
+            if o in ('-o', '--output'):
+                opt_output = a
+            if o in ('-c', '--compare'):
+                opt_compare = a
+    except ValueError:
+        usage()
+        sys.exit(1)
+
+    if 1 < len(args):
+        usage()
+        sys.exit(2)
+
+    if None == opt_tmpdir and os.path.isdir('/dev/shm'):
+        opt_tmpdir = '/dev/shm'
+    workdir = tempfile.mkdtemp(prefix='dir-stats-bench-', dir=opt_tmpdir)
+
+    try:
+        if 1 == len(args):
+            basedir = args[0]
+            if not os.path.isdir(basedir):
+                sys.stderr.write('Error: <' + basedir \
+                        + '> is no directory.\n')
+                sys.exit(3)
+        else:
+            basedir = os.path.join(workdir, 'tree')
+            os.mkdir(basedir)
+            nfiles = createTree(basedir, opt_depth, opt_fanout, opt_files)
+            print 'created ' + str(nfiles) + ' files in ' + basedir
+
+        benchWalk(scan, basedir)
+        if 1 < opt_jobs:
+            benchJobs(scan, basedir, opt_jobs)
+        if 1 == opt_stages:
+            benchStages(basedir, workdir)
+    finally:
+        if 0 == opt_keep:
+            shutil.rmtree(workdir)
+        else:
+            print 'kept the synthetic data in ' + workdir
+
+    if None != opt_output:
+        writeResults(opt_output)
+    if None != opt_compare:
+        compareResults(opt_compare)
+
+#####################################################################
+
+# Parses a list like "avi:3,mpg:1,:1" into (extension, weight) tuples.
+# An empty extension creates files without an extension.
+def parseExtensions(a):
+    extensions = [ ]
+    for item in a.split(','):
+        if -1 != item.find(':'):
+            ext, weight = item.rsplit(':', 1)
+            extensions.append((ext, int(weight)))
+        else:
+            extensions.append((item, 1))
+    return extensions
+
+#####################################################################
+
+# Parses "uniform:MAX" or "lognormal:MU:SIGMA".
+def parseSizes(a):
+    parts = a.split(':')
+    if 'uniform' == parts[0] and 2 == len(parts):
+        return ('uniform', float(parts[1]))
+    if 'lognormal' == parts[0] and 3 == len(parts):
+        return ('lognormal', float(parts[1]), float(parts[2]))
+    raise ValueError(a)
+
+#####################################################################
+
+def randomSize(rnd):
+    if 'lognormal' == opt_sizes[0]:
+        return int(rnd.lognormvariate(opt_sizes[1], opt_sizes[2]))
+    return int(rnd.uniform(0, opt_sizes[1]))
+
+#####################################################################
+
+def randomExtension(rnd):
+    total = sum([ weight for ext, weight in opt_extensions ])
+    pick = rnd.uniform(0, total)
+    for ext, weight in opt_extensions:
+        pick = pick - weight
+        if 0 > pick:
+            return ext
+    return opt_extensions[-1][0]
+
+#####################################################################
+
+# The files are created sparse, so large sizes do not fill the disk.
+def createTree(basedir, depth, fanout, nfiles):
+    rnd = random.Random(42)
+    count = 0
+    pending = [ (basedir, 0) ]
+    while pending:
+        path, level = pending.pop()
+        for i in range(nfiles):
+            ext = randomExtension(rnd)
+            name = 'file%05d' % i
+            if '' != ext:
+                name = name + '.' + ext
+            f = open(os.path.join(path, name), 'wb')
+            f.truncate(randomSize(rnd))
+            f.close()
+            count = count + 1
+        if level < depth:
+            for i in range(fanout):
+                sub = os.path.join(path, 'dir%03d' % i)
+                os.mkdir(sub)
+                pending.append((sub, level + 1))
+    return count
+
+#####################################################################
+
+class CountingEntry(object):
+    def __init__(self, entry, counter):
+        self.entry = entry
+        self.counter = counter
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self):
+        return self.entry.is_dir()
+
+    def is_symlink(self):
+        return self.entry.is_symlink()
+
+    def stat(self):
+        self.counter['stat'] = self.counter['stat'] + 1
+        return self.entry.stat()
+
+#####################################################################
+
+def runWalk(scanner, basedir):
+    options = scanner.ScanOptions()
+    files = 0
+    for fullname, filename, entry in scanner.walkTree(basedir, options):
+        try:
+            scanner.fileSize(fullname, entry, options)
+        except OSError:
+            pass
+        files = files + 1
+    return files
+
+#####################################################################
+
+def countWalk(scanner, basedir, engine):
+    counter = { 'list': 0, 'stat': 0 }
+    real_stat = os.stat
+    real_lstat = os.lstat
+    real_listdir = os.listdir
+    real_scandir = scanner.scandir
+
+    def c_stat(*args, **kwargs):
+        counter['stat'] = counter['stat'] + 1
+        return real_stat(*args, **kwargs)
+
+    def c_lstat(*args, **kwargs):
+        counter['stat'] = counter['stat'] + 1
+        return real_lstat(*args, **kwargs)
+
+    def c_listdir(*args, **kwargs):
+        counter['list'] = counter['list'] + 1
+        return real_listdir(*args, **kwargs)
+
+    def c_scandir(path):
+        counter['list'] = counter['list'] + 1
+        return [ CountingEntry(e, counter) for e in real_scandir(path) ]
+
+    os.stat = c_stat
+    os.lstat = c_lstat
+    os.listdir = c_listdir
+    if 'scandir' == engine:
+        scanner.scandir = c_scandir
+    else:
+        scanner.scandir = None
+    try:
+        runWalk(scanner, basedir)
+    finally:
+        os.stat = real_stat
+        os.lstat = real_lstat
+        os.listdir = real_listdir
+        scanner.scandir = real_scandir
+    return counter
+
+#####################################################################
+
+def timeWalk(scanner, basedir, engine, runs):
+    real_scandir = scanner.scandir
+    if 'walk' == engine:
+        scanner.scandir = None
+    best = None
+    files = 0
+    try:
+        for i in range(runs):
+            start = time.time()
+            files = runWalk(scanner, basedir)
+            elapsed = time.time() - start
+            if None == best or elapsed < best:
+                best = elapsed
+    finally:
+        scanner.scandir = real_scandir
+    return files, best
+
+#####################################################################
+
+def benchWalk(scanner, basedir):
+    engines = [ 'walk' ]
+    if None != scanner.scandir:
+        engines.insert(0, 'scandir')
+    else:
+        sys.stderr.write('Warning: scandir() is not available, only ' \
+                + 'benchmarking os.listdir().\n')
+
+    walks = { }
+    for engine in engines:
+        counter = countWalk(scanner, basedir, engine)
+        files, best = timeWalk(scanner, basedir, engine, opt_runs)
+        walks[engine] = (files, counter, best)
+        results['walk-' + engine] = { 'seconds': best, 'files': files,
+                'listings': counter['list'], 'stats': counter['stat'] }
+        print '%-8s %9d files %9d listings %9d stats %10.3f s' \
+                % (engine, files, counter['list'], counter['stat'], best)
+
+    if 2 == len(walks):
+        walk = walks['walk']
+        scan = walks['scandir']
+        if 0 < scan[1]['stat'] and 0 < scan[2]:
+            print 'scandir saves %.1f%% of all stat() calls and is ' \
+                    '%.2fx as fast' % (100.0 - 100.0 * scan[1]['stat'] \
+                    / walk[1]['stat'], walk[2] / scan[2])
+
+#####################################################################
+
+def benchJobs(scanner, basedir, maxjobs):
+    jobs = 1
+    base = None
+    while jobs <= maxjobs:
+        best = None
+        for i in range(opt_runs):
+            start = time.time()
+            if 1 == jobs:
+                scanner.scanTree(basedir, [ ], 1, scanner.ScanOptions())
+            else:
+                scanner.scanTreeParallel(basedir, [ ], 1, jobs,
+                        scanner.ScanOptions())
+            elapsed = time.time() - start
+            if None == best or elapsed < best:
+                best = elapsed
+        if None == base:
+            base = best
+        results['jobs-' + str(jobs)] = { 'seconds': best }
+        print 'jobs %-3d %10.3f s %6.2fx' % (jobs, best,
+                base / max(best, 1e-9))
+        if jobs == maxjobs:
+            break
+        jobs = min(jobs * 2, maxjobs)
+
+#####################################################################
+
+# Writes an INI report with nfiles entries in the format of dir-stats.py.
+# The entries are created in sorted order, so the report can be of any
+# size without being held in memory.
+def createReport(filename, nfiles):
+    rnd = random.Random(42)
+    total = sum([ weight for ext, weight in opt_extensions ])
+    f = open(filename, 'w')
+    f.write('; created ' + time.asctime() + ' by dir-stats-bench v' \
+            + SCRIPT_VERSION + '\n\n')
+    exts = [ ext for ext, weight in opt_extensions ]
+    exts.sort()
+    totalfiles = 0
+    totalsize = 0
+    for ext in exts:
+        weight = dict(opt_extensions)[ext]
+        count = int(math.ceil(float(nfiles) * weight / total))
+        section = ext
+        suffix = '.' + ext
+        if '' == ext:
+            section = '*'
+            suffix = ''
+        size = 0
+        f.write('[' + section + ']\n')
+        for i in xrange(count):
+            fsize = randomSize(rnd)
+            f.write('/bench/dir%04d/sub%03d/file%08d%s = %d\n' % (i / 10000,
+                    (i / 100) % 1000, i, suffix, fsize))
+            size = size + fsize
+        f.write('; ' + section + ': ' + str(count) + ' files, ' \
+                + str(size) + ' bytes\n\n')
+        totalfiles = totalfiles + count
+        totalsize = totalsize + size
+    f.write('; total size: ' + str(totalfiles) + ' files, ' \
+            + str(totalsize) + ' bytes\n')
+    f.close()
+    return totalfiles
+
+#####################################################################
+
+# Runs a script as a separate process and returns the wall-clock time
+# and the peak memory of the process in KiB.
+def runStage(script, args, workdir, stdout):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+            script)
+    f_out = open(stdout, 'w')
+    start = time.time()
+    process = subprocess.Popen([ sys.executable, path ] + args,
+            cwd=workdir, stdout=f_out)
+    pid, status, rusage = os.wait4(process.pid, 0)
+    elapsed = time.time() - start
+    process.returncode = status
+    f_out.close()
+    if 0 != status:
+        sys.stderr.write('Error: ' + script + ' failed.\n')
+        sys.exit(4)
+    return elapsed, rusage.ru_maxrss
+
+#####################################################################
+
+def benchStages(basedir, workdir):
+    scan_ini = os.path.join(workdir, 'scan.ini')
+    report = os.path.join(workdir, 'report.ini')
+    stages = [ ('scan', 'dir-stats.py', [ basedir, '*' ], scan_ini) ]
+    if 0 < opt_report:
+        nfiles = createReport(report, opt_report)
+        print 'created a report with ' + str(nfiles) + ' files'
+    else:
+        report = scan_ini
+    stages.append(('summary', 'dir-stats-summary.py', [ '-l', '0',
+            report ], os.devnull))
+    stages.append(('html', 'dir-stats-ini2html.py', [ '-w', 'file0',
+            '-s', '-bench', report ], os.devnull))
+    stages.append(('mark', 'dir-stats-htmlmarker.py', [ '-w', 'sub0',
+            '-o', 'marked.html', os.path.basename(report) + '-bench.html' ],
+            os.devnull))
+
+    for name, script, args, stdout in stages:
+        best = None
+        maxrss = 0
+        for i in range(opt_runs):
+            elapsed, rss = runStage(script, args, workdir, stdout)
+            if None == best or elapsed < best:
+                best = elapsed
+            maxrss = max(maxrss, rss)
+        results['stage-' + name] = { 'seconds': best, 'maxrss': maxrss }
+        print 'stage %-8s %10.3f s %10d KiB' % (name, best, maxrss)
+
+#####################################################################
+
+def gitRevision():
+    try:
+        process = subprocess.Popen([ 'git', 'rev-parse', 'HEAD' ],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stdout=subprocess.PIPE, stderr=open(os.devnull, 'w'))
+        revision = process.communicate()[0].strip()
+    except OSError:
+        return None
+    if 0 != process.returncode:
+        return None
+    return revision
+
+#####################################################################
+
+def writeResults(filename):
+    data = {
+        'version': SCRIPT_VERSION,
+        'created': time.time(),
+        'revision': gitRevision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {
+            'depth': opt_depth,
+            'fanout': opt_fanout,
+            'files': opt_files,
+            'runs': opt_runs,
+            'extensions': opt_extensions,
+            'sizes': opt_sizes,
+            'report': opt_report,
+        },
+        'results': results,
+    }
+    try:
+        f = open(filename, 'w')
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.close()
+    except IOError:
+        sys.stderr.write('Error: Cannot write file <' + filename + '>.\n')
+        sys.exit(5)
+
+#####################################################################
+
+def compareResults(filename):
+    try:
+        f = open(filename, 'r')
+        old = json.load(f)['results']
+        f.close()
+    except (IOError, ValueError, KeyError):
+        sys.stderr.write('Error: <' + filename + '> cannot be read.\n')
+        sys.exit(6)
+    names = [ name for name in results if name in old ]
+    names.sort()
+    print
+    print '%-16s %10s %10s %8s' % ('', 'before', 'after', 'change')
+    for name in names:
+        before = old[name]['seconds']
+        after = results[name]['seconds']
+        print '%-16s %10.3f %10.3f %+7.1f%%' % (name, before, after,
+                100.0 * (after - before) / max(before, 1e-9))
+
+#####################################################################
+
+def printVersion():
+    print 'dir-stats-bench v' + SCRIPT_VERSION + ' - released ' \
+            + 'under the Zlib license'
+
+#####################################################################
+
+def usage():
+    printVersion()
+    print 'Usage: ' + os.path.basename(sys.argv[0]) + ' [options] ' \
+            + '[basedir]'
+    print
+    print 'Options:'
+    print '  -h, --help'
+    print '    Display this usage message and exit.'
+    print '  --version'
+    print '    Display the version of the script and exit.'
+    print '  -d DEPTH, --depth=DEPTH'
+    print '    Depth of the synthetic tree. Defaults to 3.'
+    print '  -n COUNT, --fanout=COUNT'
+    print '    Number of subdirectories per directory. Defaults to 5.'
+    print '  -f COUNT, --files=COUNT'
+    print '    Number of files per directory. Defaults to 50.'
+    print '  -r COUNT, --runs=COUNT'
+    print '    Number of timed runs per engine. Defaults to 3.'
+    print '  -j COUNT, --jobs=COUNT'
+    print '    Also time the threaded scan with up to COUNT threads.'
+    print '  -k, --keep'
+    print '    Do not remove the synthetic tree after the benchmark.'
+    print '  -x LIST, --extensions=LIST'
+    print '    Extension mix of the synthetic files, given as ' \
+            + 'EXT:WEIGHT,...'
+    print '    An empty EXT creates files without an extension. ' \
+            + 'Defaults to an even'
+    print '    mix of avi, mpg, jpg, txt, log, tar and no extension.'
+    print '  -z DIST, --sizes=DIST'
+    print '    Size distribution of the synthetic files, either ' \
+            + '"uniform:MAX" or'
+    print '    "lognormal:MU:SIGMA". Defaults to "uniform:4096".'
+    print '  -T DIR, --tmpdir=DIR'
+    print '    Create the synthetic data in DIR. Defaults to ' \
+            + '/dev/shm if it exists.'
+    print '  -S, --stages'
+    print '    Benchmark every stage of the pipeline in a separate ' \
+            + 'process.'
+    print '  -R COUNT, --report=COUNT'
+    print '    With "-S", use a synthetic INI report with COUNT files ' \
+            + 'instead of the'
+    print '    report of the scan.'
+    print '  -o FILENAME, --output=FILENAME'
+    print '    Write all results to the JSON file FILENAME.'
+    print '  -c FILENAME, --compare=FILENAME'
+    print '    Compare the results to the JSON file FILENAME of an ' \
+            + 'earlier run.'
+    print
+    print '"basedir" is an existing directory to benchmark. If it is ' \
+            + 'omitted, a'
+    print 'synthetic tree is created in a temporary directory.'
+
+#####################################################################
+
+if '__main__' == __name__:
+    main()
+    sys.exit(0)
@@ -0,0 +1,175 @@
+#!/usr/bin/python
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# This script converts a report created by dir-stats.py from the INI
+# format to the binary format and vice versa.
+#
+# ARGUMENTS
+# =========
+# Please call the script without any arguments for an usage message
+# explaining all options and arguments.
+#
+# HOW IT WORKS
+# ============
+# The format of the input file is detected automatically. An INI report
+# is converted to a binary report, a binary report is converted to an INI
+# report. Converting a report forth and back results in the original
+# report.
+# INI reports may be compressed with gzip, bz2 or xz. An INI report is
+# written compressed if the name of outfile ends in .gz, .bz2 or .xz or
+# if option "-z" is given. Binary reports are never compressed, as they
+# are memory-mapped for reading.
+#
+# HISTORY
+# =======
+# 2026-Oct-18 rbrt-weiler
+#   * Created the script.
+#   * Released the script as v1.0.0.
+#   * Compressed INI reports are read and written directly.
+#   * Replaced ConfigParser with the readers and writers of
+#     dirstats.report. Paths containing ':' or '=' are no longer cut
+#     off.
+#
+
+import getopt
+import os
+import sys
+
+from dirstats import binfile
+from dirstats import compress
+from dirstats import report
+
+#####################################################################
+
+SCRIPT_VERSION = '1.0.0'
+
+opt_style = 'win'
+opt_codec = None
+
+
+#####################################################################
+
+def main():
+    global opt_style, opt_codec
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hs:z:', [ 'help',
+                'version', 'style=', 'compress=' ])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(1)
+
+    for o, a in opts:
+        if o in ('-h', '--help'):
+            usage()
+            sys.exit(0)
+        if o in ('--version', ):
+            printVersion()
+            sys.exit(0)
+        if o in ('-s', '--style'):
+            if a in ('win', 'unix'):
+                opt_style = a
+            else:
+                usage()
+                sys.exit(1)
+        if o in ('-z', '--compress'):
+            if not a in compress.codecNames():
+                usage()
+                sys.exit(1)
+            opt_codec = a
+
+    if 2 != len(args):
+        usage()
+        sys.exit(2)
+    if not os.path.isfile(args[0]):
+        sys.stderr.write('Error: <' + args[0] + '> is no file.\n')
+        sys.exit(3)
+
+    if binfile.isBinaryFile(args[0]):
+        binaryToIni(args[0], args[1])
+    else:
+        iniToBinary(args[0], args[1])
+
+#####################################################################
+
+def iniToBinary(infile, outfile):
+    if None != opt_codec:
+        sys.stderr.write('Error: Binary reports cannot be compressed.\n')
+        sys.exit(1)
+    try:
+        reader = report.openReport(infile)
+    except (IOError, compress.CompressionError):
+        sys.stderr.write('Error: <' + infile + '> cannot be read.\n')
+        sys.exit(4)
+    except report.ReportError:
+        sys.stderr.write('Error: <' + infile + '> is no INI file.\n')
+        sys.exit(5)
+
+    try:
+        report.writeBinary(outfile, reader)
+    except IOError:
+        sys.stderr.write('Error: Cannot write file <' + outfile + '>.\n')
+        sys.exit(6)
+    reader.close()
+
+#####################################################################
+
+def binaryToIni(infile, outfile):
+    try:
+        reader = binfile.BinaryReader(infile)
+    except (IOError, binfile.BinaryFormatError):
+        sys.stderr.write('Error: <' + infile + '> cannot be read.\n')
+        sys.exit(4)
+
+    try:
+        f_out = compress.openWrite(outfile, opt_codec)
+        report.writeIni(f_out, reader, opt_style)
+        f_out.close()
+    except (IOError, compress.CompressionError):
+        sys.stderr.write('Error: Cannot write file <' + outfile + '>.\n')
+        sys.exit(6)
+    reader.close()
+
+#####################################################################
+
+def printVersion():
+    print 'dir-stats-convert v' + SCRIPT_VERSION + ' - released ' \
+            + 'under the Zlib license'
+
+#####################################################################
+
+def usage():
+    printVersion()
+    print 'Usage: ' + os.path.basename(sys.argv[0]) + ' [options] ' \
+            + 'infile outfile'
+    print
+    print 'Options:'
+    print '  -h, --help'
+    print '    Display this usage message and exit.'
+    print '  --version'
+    print '    Display the version of the script and exit.'
+    print '  -s STYLE, --style=STYLE'
+    print '    Define the style of INI output. Accepted values are ' \
+            + '"win" and "unix".'
+    print '    The default value is "win".'
+    print '  -z CODEC, --compress=CODEC'
+    print '    Compress the INI report with CODEC. Accepted values ' \
+            + 'are "gzip", "bz2"'
+    print '    and "xz" if the lzma module is available. An outfile ' \
+            + 'ending in .gz,'
+    print '    .bz2 or .xz is compressed as well.'
+    print
+    print '"infile" is an INI or binary report created by ' \
+            + 'dir-stats.py. An INI report'
+    print 'is converted to a binary report and vice versa. The result ' \
+            + 'is written'
+    print 'to "outfile". INI reports may be compressed.'
+
+#####################################################################
+
+if '__main__' == __name__:
+    main()
+    sys.exit(0)
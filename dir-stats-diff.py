@@ -0,0 +1,276 @@
+#!/usr/bin/python
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# This script compares two reports created by dir-stats.py or
+# dir-stats-summary.py and lists the files that were added, removed or
+# resized in between, along with the change of every extension and
+# directory.
+#
+# ARGUMENTS
+# =========
+# Please call the script without any arguments for an usage message
+# explaining all options and arguments.
+#
+# HOW IT WORKS
+# ============
+# The reports are compared by dirstats.diff, see there. The changed
+# files are spooled to temporary files and printed section by section
+# afterwards.
+#
+# OUTPUT
+# ======
+# The script prints an INI style report to stdout. The section [added]
+# lists the new files with their size, [removed] the files that are gone
+# with their former size and [resized] the files whose size changed with
+# the difference in bytes. The sections [extensions] and [directories]
+# list the difference of every section and every directory. Reports of
+# dir-stats-summary.py list directories, so comparing two of them lists
+# added, removed and resized directories and leaves out [extensions].
+#
+# HISTORY
+# =======
+# 2026-Oct-18 rbrt-weiler
+#   * Created the script.
+#   * Released the script as v1.0.0.
+#   * Moved the comparison to dirstats.diff and the reading of reports
+#     to dirstats.report.
+#   * Compare the entries of two summaries as directories.
+#
+
+import getopt
+import os
+import sys
+import time
+
+from dirstats import binfile
+from dirstats import compress
+from dirstats import diff
+from dirstats import report
+
+#####################################################################
+
+SCRIPT_VERSION = '1.0.0'
+
+EX_OK = 0
+EX_USAGE = 1
+EX_NOFILE = 2
+EX_NOREAD = 3
+EX_NOREPORT = 4
+EX_NOWRITE = 5
+
+opt_style = 'win'
+opt_limit = 1
+opt_recursive = 0
+opt_output = None
+opt_codec = None
+
+#####################################################################
+
+def main():
+    global opt_style, opt_limit, opt_recursive, opt_output, opt_codec
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hxs:l:ro:z:', [ 'help',
+                'version', 'exitcodes', 'style=', 'limit=', 'recursive',
+                'output=', 'compress=' ])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(EX_USAGE)
+
+    for o, a in opts:
+        if o in ('-h', '--help'):
+            usage()
+            sys.exit(EX_OK)
+        if o in ('--version', ):
+            printVersion()
+            sys.exit(EX_OK)
+        if o in ('-x', '--exitcodes'):
+            exitCodes()
+            sys.exit(EX_OK)
+        if o in ('-s', '--style'):
+            if a in ('win', 'unix'):
+                opt_style = a
+            else:
+                usage()
+                sys.exit(EX_USAGE)
+        if o in ('-l', '--limit'):
+            try:
+                opt_limit = int(a)
+            except ValueError:
+                opt_limit = -1
+            if 0 > opt_limit:
+                usage()
+                sys.exit(EX_USAGE)
+        if o in ('-r', '--recursive'):
+            opt_recursive = 1
+        if o in ('-o', '--output'):
+            opt_output = a
+        if o in ('-z', '--compress'):
+            if not a in compress.codecNames():
+                usage()
+                sys.exit(EX_USAGE)
+            opt_codec = a
+
+    if 2 != len(args):
+        usage()
+        sys.exit(EX_USAGE)
+    for arg in args:
+        if not os.path.isfile(arg):
+            sys.stderr.write('Error: <' + arg + '> is no file.\n')
+            sys.exit(EX_NOFILE)
+
+    old = openReport(args[0])
+    new = openReport(args[1])
+    try:
+        f_out = compress.openOutput(opt_output, opt_codec)
+    except (IOError, compress.CompressionError):
+        sys.stderr.write('Error: Cannot write file <' + str(opt_output) \
+                + '>.\n')
+        sys.exit(EX_NOWRITE)
+    sys.stdout = f_out
+    try:
+        diffReports(old, new, args[0], args[1])
+    finally:
+        sys.stdout = sys.__stdout__
+        if sys.stdout != f_out:
+            f_out.close()
+        old.close()
+        new.close()
+
+#####################################################################
+
+def openReport(filename):
+    try:
+        return report.openReport(filename)
+    except report.ReportError:
+        sys.stderr.write('Error: <' + filename + '> is no report ' \
+                + 'created by dir-stats.py.\n')
+        sys.exit(EX_NOREPORT)
+    except (IOError, binfile.BinaryFormatError,
+            compress.CompressionError):
+        sys.stderr.write('Error: <' + filename + '> cannot be read.\n')
+        sys.exit(EX_NOREAD)
+
+#####################################################################
+
+def diffReports(old, new, old_filename, new_filename):
+    kv_sep, cmt_char = report.outputStyle(opt_style)
+    result = diff.diffReports(old, new, opt_limit, opt_recursive)
+    try:
+        printDiff(result, old_filename, new_filename, kv_sep, cmt_char)
+    finally:
+        result.close()
+
+#####################################################################
+
+def printDiff(result, old_filename, new_filename, kv_sep, cmt_char):
+    print cmt_char + 'created ' + time.asctime() + ' by dir-stats-diff ' \
+            + 'v' + SCRIPT_VERSION
+    print cmt_char + 'comparing ' + old_filename + ' with ' \
+            + new_filename
+    print
+
+    entries = 'files'
+    if result.summaries:
+        entries = 'directories'
+    for kind in diff.DiffResult.KINDS:
+        print '[' + kind + ']'
+        lines = [ ]
+        for path, size in result.items(kind):
+            lines.append(path + kv_sep + str(size) + '\n')
+            if 4096 == len(lines):
+                sys.stdout.write(''.join(lines))
+                lines = [ ]
+        sys.stdout.write(''.join(lines))
+        print cmt_char + kind + ': ' + str(result.counts[kind]) \
+                + ' ' + entries + ', ' + str(result.totals[kind]) \
+                + ' bytes'
+        print
+
+    if not result.summaries:
+        printDeltas('extensions', result.sections, kv_sep, cmt_char)
+    printDeltas('directories', result.dirs, kv_sep, cmt_char)
+    print cmt_char + 'total change: ' + str(result.total()) + ' bytes'
+
+#####################################################################
+
+def printDeltas(name, deltas, kv_sep, cmt_char):
+    keys = [ key for key in deltas.keys()
+            if 0 != deltas[key] and abs(deltas[key]) >= opt_limit ]
+    keys.sort()
+    print '[' + name + ']'
+    for key in keys:
+        print key + kv_sep + str(deltas[key])
+    print cmt_char + name + ': ' + str(len(keys)) + ' changed'
+    print
+
+#####################################################################
+
+def printVersion():
+    print 'dir-stats-diff v' + SCRIPT_VERSION + ' - released under ' \
+            + 'the Zlib license'
+
+#####################################################################
+
+def exitCodes():
+    printVersion()
+    print
+    print 'Exit codes:'
+    print '  ' + str(EX_OK) + ' - Everything went fine.'
+    print '  ' + str(EX_USAGE) + ' - Wrong usage of the script.'
+    print '  ' + str(EX_NOFILE) + ' - A report is no file.'
+    print '  ' + str(EX_NOREAD) + ' - A report cannot be read.'
+    print '  ' + str(EX_NOREPORT) + ' - A file is no report.'
+    print '  ' + str(EX_NOWRITE) + ' - The output cannot be written.'
+
+#####################################################################
+
+def usage():
+    printVersion()
+    print 'Usage: ' + os.path.basename(sys.argv[0]) + ' [options] ' \
+            + 'oldreport newreport'
+    print
+    print 'Options:'
+    print '  -h, --help'
+    print '    Display this usage message and exit.'
+    print '  --version'
+    print '    Display the version of the script and exit.'
+    print '  -x, --exitcodes'
+    print '    Display a list of possible exit codes and exit.'
+    print '  -s STYLE, --style=STYLE'
+    print '    Define the style of INI output. Accepted values are ' \
+            + '"win" and "unix".'
+    print '    The default value is "win".'
+    print '  -l BYTES, --limit=BYTES'
+    print '    Only list resized files, extensions and directories ' \
+            + 'that changed by at'
+    print '    least BYTES bytes. Smaller changes still count for ' \
+            + 'their extension and'
+    print '    directory and for the total change. The default value ' \
+            + 'is 1.'
+    print '  -r, --recursive'
+    print '    Add the change of every directory to all of its parents.'
+    print '  -o FILENAME, --output=FILENAME'
+    print '    Write the output to FILENAME instead of stdout. ' \
+            + 'FILENAME ending in .gz,'
+    print '    .bz2 or .xz is compressed accordingly.'
+    print '  -z CODEC, --compress=CODEC'
+    print '    Compress the output with CODEC. Accepted values are ' \
+            + '"gzip", "bz2" and'
+    print '    "xz" if the lzma module is available.'
+    print
+    print '"oldreport" and "newreport" are INI or binary reports ' \
+            + 'created by'
+    print 'dir-stats.py, or INI reports created by dir-stats-summary.py.'
+    print 'INI reports may be compressed with gzip, bz2 or xz. Two ' \
+            + 'summaries are'
+    print 'compared directory by directory.'
+
+#####################################################################
+
+if '__main__' == __name__:
+    main()
+    sys.exit(0)
@@ -0,0 +1,266 @@
+#!/usr/bin/python
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# This script finds duplicate files in the reports created by
+# dir-stats.py or in directory trees and lists every set of identical
+# files along with the bytes that removing all but one copy would free.
+#
+# ARGUMENTS
+# =========
+# Please call the script without any arguments for an usage message
+# explaining all options and arguments.
+#
+# HOW IT WORKS
+# ============
+# The sizes of the files are taken from the reports, or from a scan of
+# every directory given. Only files sharing their size with another file
+# are read at all, and only their first and last bytes unless these
+# match as well. See dirstats.dupes for the details.
+#
+# OUTPUT
+# ======
+# The script prints an INI style report to stdout. The section
+# [duplicates] lists the files of every set with their size, followed by
+# a comment with the number of copies and the reclaimable bytes. The
+# sets with the most reclaimable bytes come first.
+#
+# HISTORY
+# =======
+# 2026-Oct-18 rbrt-weiler
+#   * Created the script.
+#   * Released the script as v1.0.0.
+#
+
+import getopt
+import os
+import sys
+import time
+
+from dirstats import binfile
+from dirstats import compress
+from dirstats import dupes
+from dirstats import report
+from dirstats import scan
+
+#####################################################################
+
+SCRIPT_VERSION = '1.0.0'
+
+EX_OK = 0
+EX_USAGE = 1
+EX_NOFILE = 2
+EX_NOREAD = 3
+EX_NOREPORT = 4
+EX_NOWRITE = 5
+
+opt_style = 'win'
+opt_jobs = 4
+opt_minsize = 1
+opt_output = None
+opt_codec = None
+
+#####################################################################
+
+def main():
+    global opt_style, opt_jobs, opt_minsize, opt_output, opt_codec
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hxs:j:l:o:z:', [ 'help',
+                'version', 'exitcodes', 'style=', 'jobs=', 'limit=',
+                'output=', 'compress=' ])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(EX_USAGE)
+
+    for o, a in opts:
+        if o in ('-h', '--help'):
+            usage()
+            sys.exit(EX_OK)
+        if o in ('--version', ):
+            printVersion()
+            sys.exit(EX_OK)
+        if o in ('-x', '--exitcodes'):
+            exitCodes()
+            sys.exit(EX_OK)
+        if o in ('-s', '--style'):
+            if a in ('win', 'unix'):
+                opt_style = a
+            else:
+                usage()
+                sys.exit(EX_USAGE)
+        if o in ('-j', '--jobs'):
+            opt_jobs = parseNumber(a, 1)
+        if o in ('-l', '--limit'):
+            opt_minsize = parseNumber(a, 1)
+        if o in ('-o', '--output'):
+            opt_output = a
+        if o in ('-z', '--compress'):
+            if not a in compress.codecNames():
+                usage()
+                sys.exit(EX_USAGE)
+            opt_codec = a
+
+    if 0 == len(args):
+        usage()
+        sys.exit(EX_USAGE)
+    for arg in args:
+        if not os.path.isfile(arg) and not os.path.isdir(arg):
+            sys.stderr.write('Error: <' + arg + '> is no file or ' \
+                    + 'directory.\n')
+            sys.exit(EX_NOFILE)
+
+    reports = [ ]
+    try:
+        for arg in args:
+            reports.append(openSource(arg))
+        try:
+            f_out = compress.openOutput(opt_output, opt_codec)
+        except (IOError, compress.CompressionError):
+            sys.stderr.write('Error: Cannot write file <' \
+                    + str(opt_output) + '>.\n')
+            sys.exit(EX_NOWRITE)
+        sys.stdout = f_out
+        try:
+            findDuplicates(reports, args)
+        finally:
+            sys.stdout = sys.__stdout__
+            if sys.stdout != f_out:
+                f_out.close()
+    finally:
+        for source in reports:
+            source.close()
+
+#####################################################################
+
+def parseNumber(a, minimum):
+    try:
+        number = int(a)
+    except ValueError:
+        number = minimum - 1
+    if minimum > number:
+        usage()
+        sys.exit(EX_USAGE)
+    return number
+
+#####################################################################
+
+# Opens the report filename, or scans it for all files if it is a
+# directory.
+def openSource(filename):
+    if os.path.isdir(filename):
+        return scan.scanReport(filename, [ '*' ])
+    try:
+        return report.openReport(filename)
+    except report.ReportError:
+        sys.stderr.write('Error: <' + filename + '> is no report ' \
+                + 'created by dir-stats.py.\n')
+        sys.exit(EX_NOREPORT)
+    except (IOError, binfile.BinaryFormatError,
+            compress.CompressionError):
+        sys.stderr.write('Error: <' + filename + '> cannot be read.\n')
+        sys.exit(EX_NOREAD)
+
+#####################################################################
+
+def findDuplicates(reports, filenames):
+    kv_sep, cmt_char = report.outputStyle(opt_style)
+    counts = { }
+    sets = dupes.findDuplicates(reports, opt_jobs, opt_minsize, counts)
+
+    print cmt_char + 'created ' + time.asctime() + ' by ' \
+            + 'dir-stats-dupes v' + SCRIPT_VERSION
+    print cmt_char + 'looking at ' + ', '.join(filenames)
+    print
+
+    print '[duplicates]'
+    files = 0
+    total = 0
+    for dupe in sets:
+        lines = [ ]
+        for path in dupe.paths:
+            lines.append(path + kv_sep + str(dupe.size) + '\n')
+        sys.stdout.write(''.join(lines))
+        print cmt_char + str(len(dupe.paths)) + ' copies of ' \
+                + str(dupe.size) + ' bytes, ' \
+                + str(dupes.reclaimable(dupe)) + ' bytes reclaimable, ' \
+                + 'sha1 ' + dupe.digest
+        files = files + len(dupe.paths)
+        total = total + dupes.reclaimable(dupe)
+    print cmt_char + 'duplicates: ' + str(len(sets)) + ' sets, ' \
+            + str(files) + ' files, ' + str(total) \
+            + ' bytes reclaimable'
+    print
+    print cmt_char + 'files: ' + str(counts['files']) + ', ' \
+            + 'candidates: ' + str(counts['candidates']) + ' with ' \
+            + str(counts['bytes']) + ' bytes, read: ' \
+            + str(counts['read']) + ' bytes'
+
+#####################################################################
+
+def printVersion():
+    print 'dir-stats-dupes v' + SCRIPT_VERSION + ' - released under ' \
+            + 'the Zlib license'
+
+#####################################################################
+
+def exitCodes():
+    printVersion()
+    print
+    print 'Exit codes:'
+    print '  ' + str(EX_OK) + ' - Everything went fine.'
+    print '  ' + str(EX_USAGE) + ' - Wrong usage of the script.'
+    print '  ' + str(EX_NOFILE) + ' - A source is no file or directory.'
+    print '  ' + str(EX_NOREAD) + ' - A report cannot be read.'
+    print '  ' + str(EX_NOREPORT) + ' - A file is no report.'
+    print '  ' + str(EX_NOWRITE) + ' - The output cannot be written.'
+
+#####################################################################
+
+def usage():
+    printVersion()
+    print 'Usage: ' + os.path.basename(sys.argv[0]) + ' [options] ' \
+            + 'source [...]'
+    print
+    print 'Options:'
+    print '  -h, --help'
+    print '    Display this usage message and exit.'
+    print '  --version'
+    print '    Display the version of the script and exit.'
+    print '  -x, --exitcodes'
+    print '    Display a list of possible exit codes and exit.'
+    print '  -s STYLE, --style=STYLE'
+    print '    Define the style of INI output. Accepted values are ' \
+            + '"win" and "unix".'
+    print '    The default value is "win".'
+    print '  -j COUNT, --jobs=COUNT'
+    print '    Read the files with COUNT threads. The default value ' \
+            + 'is 4.'
+    print '  -l BYTES, --limit=BYTES'
+    print '    Ignore files smaller than BYTES bytes. The default ' \
+            + 'value is 1, which'
+    print '    ignores empty files only.'
+    print '  -o FILENAME, --output=FILENAME'
+    print '    Write the output to FILENAME instead of stdout. ' \
+            + 'FILENAME ending in .gz,'
+    print '    .bz2 or .xz is compressed accordingly.'
+    print '  -z CODEC, --compress=CODEC'
+    print '    Compress the output with CODEC. Accepted values are ' \
+            + '"gzip", "bz2" and'
+    print '    "xz" if the lzma module is available.'
+    print
+    print '"source" is an INI or binary report created by ' \
+            + 'dir-stats.py, or a directory'
+    print 'that is scanned for all files. Duplicates are found across ' \
+            + 'all sources.'
+    print 'INI reports may be compressed with gzip, bz2 or xz. The ' \
+            + 'files listed in a'
+    print 'report are read, so they have to be accessible.'
+
+#####################################################################
+
+if '__main__' == __name__:
+    main()
+    sys.exit(0)
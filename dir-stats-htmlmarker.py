@@ -10,7 +10,8 @@
 # REQUIREMENTS
 # ============
 # The file that is parsed has to be created by dir-stats-ini2html.py
-# v1.2.0 or greater. It relies on the specific output format.
+# v1.2.0 or greater. It relies on the specific output format: every
+# table row is written on a line of its own.
 #
 # ARGUMENTS
 # =========
@@ -19,6 +20,17 @@
 #
 # HISTORY
 # =======
+# 2026-Oct-18 rbrt-weiler
+#   * Replaced xml.dom.minidom with a line by line pass over the file.
+#     Only the class attribute of marked rows is changed, everything
+#     else is copied unchanged.
+#   * Keywords are matched with dirstats.matcher, which checks all
+#     keywords in a single pass.
+#   * Added option '-k' to count the rows marked by every keyword.
+#   * Compressed HTML files are read directly. The output is compressed
+#     by the suffix of the file given with '-o' or with option '-z'.
+#   * Moved the marking of rows to dirstats.html.
+#   * Released the script as v1.1.0.
 # 2011-Apr-01 rbrt-weiler
 #   * Added speaking exit codes and option '-x'.
 #   * Added option '--version'.
@@ -34,11 +46,14 @@
 import getopt
 import os.path
 import sys
-import xml.dom.minidom
+
+from dirstats import compress
+from dirstats import html
+from dirstats.matcher import WordMatcher
 
 #####################################################################
 
-SCRIPT_VERSION = '1.0.0'
+SCRIPT_VERSION = '1.1.0'
 
 EX_SUCCESS = 0
 EX_NOARGS = 1
@@ -51,16 +66,19 @@ opt_parsefile = ''
 opt_words = [ ]
 opt_wordfile = None
 opt_outfile = None
+opt_keywords = 0
+opt_codec = None
 
 #####################################################################
 
 def main():
-    global opt_parsefile, opt_words, opt_wordfile, opt_outfile
+    global opt_parsefile, opt_words, opt_wordfile, opt_outfile, \
+            opt_keywords, opt_codec
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:], 'hxw:f:o:', [ 'help',
+        opts, args = getopt.getopt(sys.argv[1:], 'hxw:f:o:kz:', [ 'help',
                 'version', 'exitcodes', 'word=', 'wordfile=',
-                'outfile=' ])
+                'outfile=', 'keywords', 'compress=' ])
     except getopt.GetoptError:
         usage()
         sys.exit(1)
@@ -81,6 +99,13 @@ def main():
             opt_wordfile = a
         if o in ('-o', '--outfile'):
             opt_outfile = a
+        if o in ('-k', '--keywords'):
+            opt_keywords = 1
+        if o in ('-z', '--compress'):
+            if not a in compress.codecNames():
+                usage()
+                sys.exit(EX_NOARGS)
+            opt_codec = a
 
     if 1 != len(args):
         usage()
@@ -116,36 +141,42 @@ def parseWordfile(filename):
 
 def parseFile(filename, wordlist, outfile = None):
     try:
-        dom = xml.dom.minidom.parse(filename)
+        f_in = compress.openRead(filename)
     except:
+        sys.stderr.write('Error: <' + filename + '> cannot be read.\n')
+        sys.exit(EX_NOTREADABLE)
+    line = f_in.readline()
+    if not line.startswith('<?xml'):
         sys.stderr.write('Error: <' + filename \
                 + '> is not well-formed.\n')
         sys.exit(EX_NOTWELLFORMED)
-    bodies = dom.getElementsByTagName('tbody')
-    for body in bodies:
-        rows = body.getElementsByTagName('tr')
-        for row in rows:
-            cells = row.getElementsByTagName('td')
-            if 3 != len(cells):
-                continue
-            name = cells[0].firstChild.nodeValue
-            size = cells[1].firstChild.nodeValue
-            unit = cells[2].firstChild.nodeValue
-            for word in wordlist:
-                if -1 != name.lower().find(word.lower()):
-                    row.setAttribute('class', \
-                            row.getAttribute('class') + ' mark')
-                    break
-    if None == outfile:
-        print dom.toxml('UTF-8')
-    else:
-        try:
-            f_out = open(outfile, 'w')
-            f_out.write(dom.toxml('UTF-8'))
-        except:
-            sys.stderr.write('Error: Cannot write file <' + outfile \
-                    + '>.\n')
-            sys.exit(EX_NOTWRITEABLE)
+
+    try:
+        f_out = compress.openOutput(outfile, opt_codec)
+    except:
+        sys.stderr.write('Error: Cannot write file <' + str(outfile) \
+                + '>.\n')
+        sys.exit(EX_NOTWRITEABLE)
+
+    counts = { }
+    try:
+        f_out.write(line)
+        f_out.writelines(html.markLines(f_in, WordMatcher(wordlist),
+                counts))
+        if sys.stdout != f_out:
+            f_out.close()
+    except IOError:
+        sys.stderr.write('Error: Cannot write file <' + str(outfile) \
+                + '>.\n')
+        sys.exit(EX_NOTWRITEABLE)
+    f_in.close()
+
+    if 1 == opt_keywords:
+        words = counts.keys()
+        words.sort()
+        for word in words:
+            sys.stderr.write(word + ': ' + str(counts[word]) \
+                    + ' rows\n')
 
 #####################################################################
 
@@ -177,8 +208,20 @@ def usage():
     print '  -o FILENAME, --outfile=FILENAME'
     print '    Write the output to the file FILENAME instead of ' \
             + 'stdout.'
+    print '  -z CODEC, --compress=CODEC'
+    print '    Compress the output with CODEC. Accepted values are ' \
+            + '"gzip", "bz2" and'
+    print '    "xz" if the lzma module is available. A FILENAME given ' \
+            + 'with \'-o\''
+    print '    ending in .gz, .bz2 or .xz is compressed as well.'
+    print '  -k, --keywords'
+    print '    Write the number of rows marked by every keyword to ' \
+            + 'stderr. A row'
+    print '    is counted for the keyword found first in the file name.'
     print
-    print '"htmlfile" is the HTML file that shall be parsed.'
+    print '"htmlfile" is the HTML file that shall be parsed. It may ' \
+            + 'be compressed'
+    print 'with gzip, bz2 or xz.'
 
 #####################################################################
 
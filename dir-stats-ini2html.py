@@ -14,6 +14,22 @@
 #
 # HISTORY
 # =======
+# 2026-Oct-18 rbrt-weiler
+#   * Binary reports written by dir-stats.py are read directly.
+#   * Replaced ConfigParser with a reader that indexes the sections of
+#     the INI file and streams their entries. Rows are written directly
+#     to the HTML file; the totals in the table footer are computed
+#     beforehand.
+#   * Added option '-r' to split every section into pages with an
+#     index page.
+#   * Words given with '-w' are matched with dirstats.matcher, which
+#     checks all words in a single pass.
+#   * Compressed reports are read directly. HTML files are compressed
+#     by the suffix of their extension or with option '-z'.
+#   * Moved the HTML output to dirstats.html and the reading of reports
+#     to dirstats.report. Entries whose size is no number are shown with
+#     0 bytes like in the other scripts instead of being marked.
+#   * Released the script as v1.3.0.
 # 2011-Apr-01 rbrt-weiler
 #   * Improved the code for marking a table row.
 #   * Added option '--version'.
@@ -37,38 +53,43 @@
 #
 
 import getopt
+import itertools
 import os
 import sys
-import time
-import ConfigParser
+import urllib
 
 from xml.sax.saxutils import escape
 
+from dirstats import binfile
+from dirstats import compress
+from dirstats import html
+from dirstats import report
+from dirstats.matcher import WordMatcher
+
 #####################################################################
 
-SCRIPT_VERSION = '1.2.0'
+SCRIPT_VERSION = '1.3.0'
 
 opt_prefix = ''
 opt_suffix = ''
 opt_extension = 'html'
 opt_title = None
 opt_words = [ ]
+opt_rows = 0
+opt_codec = None
 
-#####################################################################
-
-class MyRawConfigParser(ConfigParser.RawConfigParser):
-    def optionxform(self, optionstr):
-        return str(optionstr)
+word_matcher = None
 
 #####################################################################
 
 def main():
-    global opt_prefix, opt_suffix, opt_extension, opt_title, opt_words
+    global opt_prefix, opt_suffix, opt_extension, opt_title, opt_words, \
+            opt_rows, opt_codec
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:], 'hp:s:e:t:w:', [ 'help',
-                'version', 'prefix=', 'suffix=', 'extension=', 'title=',
-                'word=' ])
+        opts, args = getopt.getopt(sys.argv[1:], 'hp:s:e:t:w:r:z:', [
+                'help', 'version', 'prefix=', 'suffix=', 'extension=',
+                'title=', 'word=', 'rows=', 'compress=' ])
     except getopt.GetoptError:
         usage()
         sys.exit(1)
@@ -90,6 +111,19 @@ def main():
             opt_title = a
         if o in ('-w', '--word'):
             opt_words.append(a)
+        if o in ('-r', '--rows'):
+            try:
+                opt_rows = int(a)
+            except ValueError:
+                opt_rows = 0
+            if 1 > opt_rows:
+                usage()
+                sys.exit(1)
+        if o in ('-z', '--compress'):
+            if not a in compress.codecNames():
+                usage()
+                sys.exit(1)
+            opt_codec = a
 
     if 0 == len(args):
         usage()
@@ -100,156 +134,130 @@ def main():
                 print 'Error: "' + arg + '" is no file.'
                 sys.exit(3)
 
+    if None != opt_codec:
+        opt_extension = opt_extension + compress.suffixOf(opt_codec)
+
     createHtml(args)
 
 #####################################################################
 
 def createHtml(filenames):
+    global word_matcher
+    word_matcher = WordMatcher(opt_words)
+
     for infile in filenames:
-        cfg_parser = MyRawConfigParser()
-        try:
-            f_in = open(infile, 'r')
-        except:
-            print 'Error: Cannot read file "' + infile + '".'
-            sys.exit(4)
-        cfg_parser.readfp(f_in)
-        f_in.close()
+        reader = openReport(infile)
 
         html_title = os.path.basename(infile)
         if None != opt_title:
             html_title = str(opt_title)
 
-        outfile = opt_prefix + os.path.basename(infile) + opt_suffix \
-                + '.' + opt_extension
-        try:
-            f_out = open(outfile, 'w')
-        except:
-            print 'Error: Cannot write file "' + outfile + '".'
-            sys.exit(6)
-        writeHtmlLeader(f_out, html_title)
-
-        sections = cfg_parser.sections()
-        sections.sort()
-        for section in sections:
-            files_total = 0
-            size_total = 0
-            f_out.write('<hr />\n')
-            f_out.write('<table width="100%">\n')
-            f_out.write('<caption>' + escape(section) + '</caption>\n')
-            f_out.write('<colgroup>\n')
-            f_out.write('<col width="88%" />\n')
-            f_out.write('<col width="10%" />\n')
-            f_out.write('<col width="2%" />\n')
-            f_out.write('</colgroup>\n')
-            f_out.write('<thead>\n')
-            f_out.write('<tr><th>File</th><th>Size</th><th>Unit</th></tr>\n')
-            f_out.write('</thead>\n')
-            b_out = ''
-            options = cfg_parser.options(section)
-            options.sort()
-            if 0 < len(options):
-                for option in options:
-                    try:
-                        fsize = cfg_parser.getint(section, option)
-                    except ValueError:
-                        fsize = -1
-                        option = option + ' {{ERROR}}'
-                    if 0 == (files_total % 2):
-                        colo = 'teven'
-                    else:
-                        colo = 'todd'
-                    if 0 < len(opt_words):
-                        for word in opt_words:
-                            if -1 != option.lower().find(word.lower()):
-                                colo += ' mark'
-                                break
-                    size, unit = computeSizeAndUnit(fsize)
-                    b_out += '<tr class="' + colo + '"><td>' \
-                            + escape(option) + '</td>' \
-                            + '<td align="right">' \
-                            + size + '</td><td>' \
-                            + unit + '</td></tr>\n'
-                    files_total = files_total + 1
-                    size_total = size_total + fsize
-                size, unit = computeSizeAndUnit(size_total)
-            else:
-                size = str(0)
-                unit = 'B'
-                b_out += '<tr><td colspan="3" align="center">No ' \
-                        + 'matching files found.</td></tr>\n'
-            f_out.write('<tfoot>\n')
-            f_out.write('<tr><td colspan="3">' + escape(section) \
-                    + ': ' + str(files_total) + ' objects, ' + size \
-                    + ' ' + unit + '</td></tr>\n')
-            f_out.write('</tfoot>\n')
-            f_out.write('<tbody>\n')
-            f_out.write(b_out)
-            f_out.write('</tbody>\n')
-            f_out.write('</table>\n')
-
-        writeHtmlTrailer(f_out)
+        outbase = opt_prefix + os.path.basename(infile) + opt_suffix
+        if 0 < opt_rows:
+            createPages(reader, outbase, html_title)
+            reader.close()
+            continue
+
+        f_out = openHtml(outbase + '.' + opt_extension)
+        html.writeHtml(f_out, reader, html_title, creator(), word_matcher)
         f_out.close()
- 
+        reader.close()
+
 #####################################################################
 
-def writeHtmlLeader(f, title):
-    if not isinstance(f, file):
-        print 'Error: writeHtmlLeader: Parameter is no file object.'
-        sys.exit(7)
-
-    title = escape(title)
-    
-    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    f.write('<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 ' \
-            + 'Transitional//EN" ' \
-            + '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n')
-    f.write('<html xmlns="http://www.w3.org/1999/xhtml">\n')
-    f.write('<head>\n')
-    f.write('<meta http-equiv="Content-Type" content="' \
-            + 'text/html; charset=UTF-8" />\n')
-    f.write('<title>' + title + '</title>\n')
-    f.write('<style type="text/css">\n')
-    f.write('html, body { background-color: #fff; color: #000; }\n')
-    f.write('caption { text-align: center; font-size: 150%; ' \
-            + 'font-weight: bold }\n')
-    f.write('th { text-align: center; font-weight: bold; }\n')
-    f.write('tr.teven td { background-color: #eee; color: #000; }\n')
-    f.write('tr.todd td { }\n')
-    f.write('tr.mark td { background-color: #ff0; color: #000; }\n')
-    f.write('tfoot td { text-align: center; }\n')
-    f.write('</style>\n')
-    f.write('</head>\n')
-    f.write('<body>\n')
-    f.write('<h1>' + title + '</h1>\n')
+# Writes an index page to outbase.EXTENSION and one file per opt_rows
+# rows of every section. The index lists the totals of every section
+# and links to its pages. Every page repeats the totals of its section
+# in the table footer.
+def createPages(reader, outbase, html_title):
+    sections = reader.sectionNames()
+    index = os.path.basename(outbase + '.' + opt_extension)
+
+    f_index = openHtml(outbase + '.' + opt_extension)
+    html.writeHtmlLeader(f_index, html_title)
+    f_index.write('<hr />\n')
+    f_index.write('<table width="100%">\n')
+    f_index.write('<thead>\n')
+    f_index.write('<tr><th>Section</th><th>Objects</th><th>Size</th>' \
+            + '<th>Unit</th><th>Pages</th></tr>\n')
+    f_index.write('</thead>\n')
+    f_index.write('<tbody>\n')
+
+    for number in range(len(sections)):
+        section = sections[number]
+        files_total, size_total = reader.totals(section)
+        pages = max(1, (files_total + opt_rows - 1) / opt_rows)
+        names = [ '%s-%d-%d.%s' % (outbase, number + 1, page + 1,
+                opt_extension) for page in range(pages) ]
+
+        size, unit = html.computeSizeAndUnit(size_total)
+        links = [ '<a href="%s">%d</a>' % (pageLink(names[page]),
+                page + 1) for page in range(pages) ]
+        f_index.write('<tr><td>' + escape(section) + '</td>' \
+                + '<td align="right">' + str(files_total) + '</td>' \
+                + '<td align="right">' + size + '</td><td>' + unit \
+                + '</td><td>' + ' '.join(links) + '</td></tr>\n')
+
+        items = reader.items(section)
+        for page in range(pages):
+            title = html_title + ' - ' + section + ' - page ' \
+                    + str(page + 1) + ' of ' + str(pages)
+            navigation = '<a href="' + pageLink(index) + '">Index</a>'
+            if 0 < page:
+                navigation = navigation + ' | <a href="' \
+                        + pageLink(names[page - 1]) + '">Previous</a>'
+            if page + 1 < pages:
+                navigation = navigation + ' | <a href="' \
+                        + pageLink(names[page + 1]) + '">Next</a>'
+            navigation = '<div align="center">' + navigation + '</div>\n'
+
+            f_out = openHtml(names[page])
+            html.writeHtmlLeader(f_out, title)
+            f_out.write(navigation)
+            html.writeTable(f_out, section, files_total, size_total,
+                    itertools.islice(items, opt_rows), page * opt_rows,
+                    word_matcher)
+            f_out.write(navigation)
+            html.writeHtmlTrailer(f_out, creator())
+            f_out.close()
+
+    f_index.write('</tbody>\n')
+    f_index.write('</table>\n')
+    html.writeHtmlTrailer(f_index, creator())
+    f_index.close()
 
 #####################################################################
 
-def writeHtmlTrailer(f):
-    if not isinstance(f, file):
-        print 'Error: writeHtmlTrailer: Parameter is no file object.'
-        sys.exit(7)
+def pageLink(filename):
+    return escape(urllib.quote(os.path.basename(filename)))
 
-    f.write('<hr />\n')
-    f.write('<div align="right"><em>Created ' \
-            + escape(time.asctime()) + ' by dir-stats-ini2html v' \
-            + SCRIPT_VERSION + '</em></div>\n')
-    f.write('</body>\n')
-    f.write('</html>')
+#####################################################################
+
+def openHtml(outfile):
+    try:
+        return compress.openWrite(outfile, None, 1024 * 1024)
+    except:
+        print 'Error: Cannot write file "' + outfile + '".'
+        sys.exit(6)
 
 #####################################################################
 
-def computeSizeAndUnit(fsize):
-    if not isinstance(fsize, int):
-        fsize = int(fsize)
+def openReport(infile):
+    try:
+        return report.openReport(infile)
+    except report.ReportError:
+        print 'Error: "' + infile + '" is no report created by ' \
+                + 'dir-stats.py.'
+        sys.exit(5)
+    except (IOError, binfile.BinaryFormatError,
+            compress.CompressionError):
+        print 'Error: Cannot read file "' + infile + '".'
+        sys.exit(4)
 
-    if fsize > (1024 * 1024 * 1024):
-        return [ '%.2f' % (float(fsize) / 1024 / 1024 / 1024), 'GiB' ]
-    elif fsize > (1024 * 1024):
-        return [ '%.2f' % (float(fsize) / 1024 / 1024), 'MiB' ]
-    elif fsize > 1024:
-        return [ '%.2f' % (float(fsize) / 1024), 'KiB' ]
-    else:
-        return [ str(fsize), 'B' ]
+#####################################################################
+
+def creator():
+    return 'dir-stats-ini2html v' + SCRIPT_VERSION
 
 #####################################################################
 
@@ -283,10 +291,26 @@ def usage():
     print '    given multiple times to highlight multiple words. ' \
             + 'Words are'
     print '    case-insensitive. Only full lines are marked.'
+    print '  -z CODEC, --compress=CODEC'
+    print '    Compress the HTML files with CODEC and append the ' \
+            + 'matching suffix to'
+    print '    their extension. Accepted values are "gzip", "bz2" and ' \
+            + '"xz" if the'
+    print '    lzma module is available. An extension ending in .gz, ' \
+            + '.bz2 or .xz'
+    print '    compresses the files as well.'
+    print '  -r ROWS, --rows=ROWS'
+    print '    Split every section into pages of ROWS rows. The pages ' \
+            + 'are written to'
+    print '    separate files, the HTML file itself becomes an index ' \
+            + 'of all'
+    print '    sections and their pages.'
     print
     print '"inifiles" is a list of one or more INI files that shall ' \
             + 'be compiled to one'
-    print 'or more HTML files.'
+    print 'or more HTML files. Binary reports created by dir-stats.py ' \
+            + 'are accepted, too.'
+    print 'INI files may be compressed with gzip, bz2 or xz.'
 
 #####################################################################
 
@@ -18,37 +18,72 @@
 #
 # HISTORY
 # =======
+# 2026-Oct-18 rbrt-weiler
+#   * Binary reports written by dir-stats.py are read directly.
+#   * Replaced ConfigParser with a streaming reader for the INI files
+#     written by dir-stats.py. Paths containing ':' or '=' are no longer
+#     cut off.
+#   * Added option "-r" to report the recursive size of directories,
+#     along with the options "-d" and "-n" to limit the output.
+#   * Added option "-j" to read the reports with several processes.
+#   * Added option "-m" to merge all reports into a single section.
+#   * Added option "-t" to only report the largest directories.
+#   * Compressed reports are read directly. Added option "-o" to write
+#     the output to a file and option "-z" to compress it.
+#   * Moved the summing up of directories to dirstats.summary and the
+#     reading of reports to dirstats.report.
+#   * Added option "--distribution" to merge the size distributions of
+#     all reports.
+#   * Added option "--cold" to report the bytes not modified for a number
+#     of days instead of all bytes, along with "--accessed" to look at
+#     the time of the last access instead.
+#   * Released the script as v1.1.0.
 # 2008-Jan-22 rbrt-weiler
 #   * Created the script.
 #
 
 import getopt
+import multiprocessing
 import os.path
 import sys
 import time
-import ConfigParser
+
+from dirstats import binfile
+from dirstats import compress
+from dirstats import distribution
+from dirstats import report
+from dirstats import summary as summaries
 
 ##########################################################################
 
-SCRIPT_VERSION = '1.0.0'
+SCRIPT_VERSION = '1.1.0'
 
 opt_limit = 50000000
 opt_style = 'win'
-
-##########################################################################
-
-class MyRawConfigParser(ConfigParser.RawConfigParser):
-    def optionxform(self, optionstr):
-        return str(optionstr)
+opt_recursive = 0
+opt_depth = -1
+opt_children = 0
+opt_jobs = 1
+opt_merge = 0
+opt_top = 0
+opt_output = None
+opt_codec = None
+opt_distribution = 0
+opt_cold = 0
+opt_accessed = 0
 
 ##########################################################################
 
 def main():
-    global opt_limit, opt_style
+    global opt_limit, opt_style, opt_recursive, opt_depth, opt_children, \
+            opt_jobs, opt_merge, opt_top, opt_output, opt_codec, \
+            opt_distribution, opt_cold, opt_accessed
     
     try:
-        opts, args = getopt.getopt(sys.argv[1:], 'hl:s:', [ 'help',
-                'limit=', 'style=' ])
+        opts, args = getopt.getopt(sys.argv[1:], 'hl:s:rd:n:j:mt:o:z:', [
+                'help', 'limit=', 'style=', 'recursive', 'depth=',
+                'children=', 'jobs=', 'merge', 'top=', 'output=',
+                'compress=', 'distribution', 'cold=', 'accessed' ])
     except getopt.GetoptError:
         usage()
         sys.exit(1)
@@ -65,6 +100,31 @@ def main():
             else:
                 usage()
                 sys.exit(1)
+        if o in ('-r', '--recursive'):
+            opt_recursive = 1
+        if o in ('-d', '--depth'):
+            opt_depth = parseNumber(a, 0)
+        if o in ('-n', '--children'):
+            opt_children = parseNumber(a, 0)
+        if o in ('-j', '--jobs'):
+            opt_jobs = parseNumber(a, 1)
+        if o in ('-m', '--merge'):
+            opt_merge = 1
+        if o in ('-t', '--top'):
+            opt_top = parseNumber(a, 1)
+        if o in ('-o', '--output'):
+            opt_output = a
+        if o in ('-z', '--compress'):
+            if not a in compress.codecNames():
+                usage()
+                sys.exit(1)
+            opt_codec = a
+        if o in ('--distribution', ):
+            opt_distribution = 1
+        if o in ('--cold', ):
+            opt_cold = parseNumber(a, 1)
+        if o in ('--accessed', ):
+            opt_accessed = 1
 
     if 0 == len(args):
         usage()
@@ -72,69 +132,223 @@ def main():
     else:
         for arg in args:
             if not os.path.isfile(arg):
-                print 'Error: "' + arg + '" is no file.'
+                sys.stderr.write('Error: "' + arg + '" is no file.\n')
                 sys.exit(2)
 
-    summarize(args)
+    if None == opt_output and None == opt_codec:
+        summarize(args)
+        return
+    try:
+        f_out = compress.openOutput(opt_output, opt_codec)
+    except (IOError, compress.CompressionError):
+        sys.stderr.write('Error: Cannot write file "' \
+                + str(opt_output) + '".\n')
+        sys.exit(5)
+    sys.stdout = f_out
+    try:
+        summarize(args)
+    finally:
+        sys.stdout = sys.__stdout__
+        f_out.close()
+
+##########################################################################
+
+def parseNumber(a, minimum):
+    try:
+        number = int(a)
+    except ValueError:
+        number = minimum - 1
+    if minimum > number:
+        usage()
+        sys.exit(1)
+    return number
 
 ##########################################################################
 
 def summarize(filenames):
-    if 'win' == opt_style:
-        cmt_char = ';'
-        kv_sep = ' = '
-    else:
-        cmt_char = '#'
-        kv_sep = ': '
+    kv_sep, cmt_char = report.outputStyle(opt_style)
 
-    summary = { }
-    
-    print cmt_char + ' created ' + time.asctime() + ' by ' \
+    print cmt_char + 'created ' + time.asctime() + ' by ' \
             + 'dir-stats-summary v' + SCRIPT_VERSION
-    print cmt_char + ' using a limit of ' + str(opt_limit) + ' bytes'
+    print cmt_char + 'using a limit of ' + str(opt_limit) + ' bytes'
+    if 1 == opt_recursive:
+        print cmt_char + 'using recursive directory sizes'
+    if 0 < opt_top:
+        print cmt_char + 'largest ' + str(opt_top) + ' directories only'
+    if 0 < opt_cold:
+        print cmt_char + 'bytes not ' + agesTime() + ' for ' \
+                + str(opt_cold) + ' days only'
 
-    for filename in filenames:
-        cfg_parser = MyRawConfigParser()
-        try:
-            f_in = open(filename, 'r')
-        except:
-            print 'Error: Cannot read file "' + filename + '".'
-            sys.exit(3)
-        cfg_parser.readfp(f_in)
-        f_in.close()
-
-        sections = cfg_parser.sections()
-        for section in sections:
-            options = cfg_parser.options(section)
-            for option in options:
-                try:
-                    size = cfg_parser.getint(section, option)
-                except ValueError:
-                    size = 0
-                (basedir, basename) = os.path.split(option)
-                if summary.has_key(basedir):
-                    summary[basedir] = summary[basedir] + size
-                else:
-                    summary[basedir] = size
-
-        total_dirs = 0
-        total_size = 0
+    if 1 == opt_merge:
+        mergeSummaries(filenames, cmt_char, kv_sep)
+    else:
+        printSummaries(filenames, cmt_char, kv_sep)
+    if 1 == opt_distribution:
+        printDistribution(filenames, cmt_char)
+
+##########################################################################
+
+def printSummaries(filenames, cmt_char, kv_sep):
+    for filename, summary in loadSummaries(filenames):
         filename = os.path.basename(filename)
+        summary, total_size = summaries.selectDirs(summary, opt_limit,
+                opt_recursive, opt_depth, opt_children, opt_top)
 
         dirs = summary.keys()
         dirs.sort()
         print
         print '[' + filename + ']'
         for dir in dirs:
-            if summary[dir] >= opt_limit:
-                print dir + kv_sep + str(summary[dir])
-                total_dirs = total_dirs + 1
-                total_size = total_size + summary[dir]
-        print cmt_char + ' ' + filename + ': ' + str(total_dirs) \
+            print dir + kv_sep + str(summary[dir])
+        print cmt_char + filename + ': ' + str(len(dirs)) \
                 + ' directories with ' + str(total_size) + ' bytes'
-        
-        cfg_parser = None
-        summary = { }
+
+##########################################################################
+
+# Sums up the sizes of the files in every directory of the report
+# filename.
+def summarizeFile(filename):
+    try:
+        if 0 < opt_cold:
+            return coldDirs(filename)
+        return summaries.summarizeItems(report.fileItems(filename))
+    except report.ReportError:
+        sys.stderr.write('Error: "' + filename + '" is no report ' \
+                + 'created by dir-stats.py.\n')
+        sys.exit(4)
+    except (IOError, binfile.BinaryFormatError,
+            compress.CompressionError):
+        sys.stderr.write('Error: Cannot read file "' + filename \
+                + '".\n')
+        sys.exit(3)
+
+##########################################################################
+
+# Runs in a worker process. The exit code of a failing report is handed
+# back to the main process, as leaving a worker would stall the pool.
+def summarizeWorker(filename):
+    try:
+        return summarizeFile(filename), None
+    except SystemExit, e:
+        return None, e.code
+
+##########################################################################
+
+# Yields (filename, summary) for every report in the given order. With
+# more than one job, the reports are read by a pool of processes.
+def loadSummaries(filenames):
+    if 1 == opt_jobs or 1 == len(filenames):
+        for filename in filenames:
+            yield filename, summarizeFile(filename)
+        return
+
+    pool = multiprocessing.Pool(min(opt_jobs, len(filenames)))
+    try:
+        results = pool.imap(summarizeWorker, filenames)
+        for filename in filenames:
+            summary, code = results.next()
+            if None == summary:
+                sys.exit(code)
+            yield filename, summary
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+##########################################################################
+
+# Prints a single section for all reports. Every directory is followed
+# by a comment listing its size in every report that contains it.
+def mergeSummaries(filenames, cmt_char, kv_sep):
+    merged = { }
+    sources = [ ]
+    for filename, summary in loadSummaries(filenames):
+        summaries.mergeSummary(merged, summary)
+        if 1 == opt_recursive:
+            summary = summaries.rollupTotals(summary)[0]
+        sources.append((os.path.basename(filename), summary))
+
+    merged, total_size = summaries.selectDirs(merged, opt_limit,
+            opt_recursive, opt_depth, opt_children, opt_top)
+
+    dirs = merged.keys()
+    dirs.sort()
+    print
+    print '[merged]'
+    for dir in dirs:
+        print dir + kv_sep + str(merged[dir])
+        breakdown = [ ]
+        for source, summary in sources:
+            if summary.has_key(dir):
+                breakdown.append(source + ' ' + str(summary[dir]))
+        print cmt_char + dir + ': ' + ', '.join(breakdown)
+    print cmt_char + 'merged: ' + str(len(dirs)) + ' directories ' \
+            + 'with ' + str(total_size) + ' bytes from ' \
+            + str(len(sources)) + ' reports'
+
+##########################################################################
+
+def agesTime():
+    if 1 == opt_accessed:
+        return 'accessed'
+    return 'modified'
+
+##########################################################################
+
+# Returns the bytes of every directory of the report filename that were
+# not modified, or not accessed, for opt_cold days. The ages are read
+# from the report, so it has to be written by dir-stats.py with
+# "--ages".
+def coldDirs(filename):
+    reader = report.openReport(filename)
+    try:
+        buckets = getattr(reader, 'ages', None)
+        if None == buckets or None == buckets.bucket(agesTime(),
+                opt_cold):
+            sys.stderr.write('Error: "' + filename + '" holds no ' \
+                    + 'ages of ' + str(opt_cold) + ' days.\n')
+            sys.exit(4)
+        return buckets.bytesOf('dir', opt_cold, agesTime())
+    finally:
+        reader.close()
+
+##########################################################################
+
+# Returns the size distribution of the report filename, or None if the
+# report has none. The report is opened a second time for this.
+def loadDistribution(filename):
+    try:
+        reader = report.openReport(filename)
+    except report.ReportError:
+        sys.stderr.write('Error: "' + filename + '" is no report ' \
+                + 'created by dir-stats.py.\n')
+        sys.exit(4)
+    except (IOError, binfile.BinaryFormatError,
+            compress.CompressionError):
+        sys.stderr.write('Error: Cannot read file "' + filename \
+                + '".\n')
+        sys.exit(3)
+    try:
+        return getattr(reader, 'distribution', None)
+    finally:
+        reader.close()
+
+##########################################################################
+
+# Merges the size distributions of all reports and prints them as a
+# section of their own.
+def printDistribution(filenames, cmt_char):
+    merged = distribution.SizeDistribution()
+    found = 0
+    for filename in filenames:
+        sizes = loadDistribution(filename)
+        if None != sizes:
+            merged.merge(sizes)
+            found = found + 1
+    print
+    print cmt_char + 'size distribution of ' + str(found) + ' of ' \
+            + str(len(filenames)) + ' reports'
+    report.writeDistribution(sys.stdout, merged, opt_style)
 
 ##########################################################################
 
@@ -155,6 +369,55 @@ def usage():
     print '    Define the style of the output. Accepted values are ' \
             + '"win" and "unix".'
     print '    The default value is "win".'
+    print '  -r, --recursive'
+    print '    Report the size of every directory including all of ' \
+            + 'its'
+    print '    subdirectories. The report starts at the deepest ' \
+            + 'directory that'
+    print '    contains all files, and the total is the size of that ' \
+            + 'directory.'
+    print '  -d DEPTH, --depth=DEPTH'
+    print '    With "-r", only report DEPTH levels of subdirectories.'
+    print '  -n COUNT, --children=COUNT'
+    print '    With "-r", only report the COUNT largest subdirectories ' \
+            + 'of every'
+    print '    directory.'
+    print '  -t COUNT, --top=COUNT'
+    print '    Only report the COUNT largest directories.'
+    print '  -j COUNT, --jobs=COUNT'
+    print '    Read the reports with COUNT processes. The default ' \
+            + 'value is 1.'
+    print '  -o FILENAME, --output=FILENAME'
+    print '    Write the output to FILENAME instead of stdout. ' \
+            + 'FILENAME ending in .gz,'
+    print '    .bz2 or .xz is compressed accordingly.'
+    print '  -z CODEC, --compress=CODEC'
+    print '    Compress the output with CODEC. Accepted values are ' \
+            + '"gzip", "bz2" and'
+    print '    "xz" if the lzma module is available.'
+    print '  -m, --merge'
+    print '    Merge all reports into a single section. Every ' \
+            + 'directory is followed'
+    print '    by a comment listing its size in every report.'
+    print '  --distribution'
+    print '    Merge the size distributions of all reports written by ' \
+            + 'dir-stats.py'
+    print '    with "--distribution" and print them as section ' \
+            + '[.distribution].'
+    print '  --cold=DAYS'
+    print '    Only count the bytes not modified for DAYS days, taken ' \
+            + 'from reports'
+    print '    written by dir-stats.py with "--ages". Along with "-r" ' \
+            + 'and "-t" this'
+    print '    reports the largest cold subtrees.'
+    print '  --accessed'
+    print '    With "--cold", count the bytes not accessed for DAYS ' \
+            + 'days instead.'
+    print
+    print '"filename" is a list of one or more INI or binary reports ' \
+            + 'created by'
+    print 'dir-stats.py. INI reports may be compressed with gzip, ' \
+            + 'bz2 or xz.'
 
 ##########################################################################
 
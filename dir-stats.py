@@ -40,6 +40,43 @@
 #
 # HISTORY
 # =======
+# 2026-Oct-18 rbrt-weiler
+#   * Replaced os.walk() and the per-file os.stat() with a traversal
+#     based on scandir(), which stats every file only once. Falls back
+#     to os.walk() if neither os.scandir nor the scandir module exist.
+#   * Added option "-j" to scan the tree with several threads.
+#   * Added option "-m" to write the report with a bounded amount of
+#     memory by spilling sorted runs to temporary files.
+#   * Added option "-c" to keep a cache of unchanged directories in an
+#     SQLite database, along with "--cache-size" and "--cache-age".
+#   * Added option "-b" to write a binary report instead of the INI
+#     report.
+#   * Added option "-t" to only report the largest files.
+#   * Added option "-p" to print the progress of the scan to stderr,
+#     along with "--stats" to save the counters and the time spent in
+#     every phase as JSON and "--profile" to run the script under
+#     cProfile. The fallback without scandir() now uses os.listdir().
+#   * Added option "-a" to keep many directory listings and stats in
+#     flight at once on high latency filesystems.
+#   * Added option "-d" to count hard linked files only once and option
+#     "-u" to report the allocated size next to the apparent size.
+#   * Added option "--distribution" to append the size distribution of
+#     every extension and top-level directory to the report.
+#   * Added option "--ages" to sum up the bytes not modified and not
+#     accessed for a number of days per directory and per extension,
+#     along with "--age-days" to choose the numbers of days.
+#   * Added options "-x" and "-i" along with "--exclude-regex",
+#     "--include-regex", "--one-file-system", "--max-depth",
+#     "--min-size", "--max-size", "--newer" and "--older" to restrict
+#     the scan. Excluded directories are not listed at all.
+#   * Added option "-o" to write the report to a file and option "-z"
+#     to compress it.
+#   * Moved the scanners to dirstats.scan and the writing of the report
+#     to dirstats.report, so they can be used without running the
+#     script.
+#   * Files are kept in a compact store while scanning: every directory
+#     is stored once, names and sizes of the files in arrays.
+#   * Released the script as v1.1.0.
 # 2017-Dec-02 rbrt-weiler
 #   * Now mapping empty extensions to ' '.
 # 2011-Mar-22 rbrt-weiler
@@ -61,22 +98,63 @@
 #   * Created the script.
 #
 
+import cProfile
 import getopt
 import os
+import re
+import sqlite3
 import sys
 import time
 
+from dirstats import ages
+from dirstats import compress
+from dirstats import distribution
+from dirstats import report
+from dirstats import scan
+
 #####################################################################
 
-SCRIPT_VERSION = '1.0.3'
+SCRIPT_VERSION = '1.1.0'
 
 opt_style = 'win'
 opt_allfiles = 0
+opt_jobs = 1
+opt_async = 0
+opt_memory = 0
+opt_cache = None
+opt_cachesize = 1024
+opt_cacheage = 7
+opt_binary = None
+opt_output = None
+opt_codec = None
+opt_top = 0
+opt_dedup = 0
+opt_allocated = 0
+opt_distribution = 0
+opt_ages = 0
+opt_agedays = ages.DEFAULT_DAYS
+opt_excludes = [ ]
+opt_includes = [ ]
+opt_onefs = 0
+opt_maxdepth = -1
+opt_minsize = 0
+opt_maxsize = -1
+opt_newer = 0
+opt_older = 0
+opt_progress = 0
+opt_stats = None
+opt_profile = None
 
 #####################################################################
 
 def main():
-    global opt_style, opt_allfiles
+    global opt_style, opt_allfiles, opt_jobs, opt_async, opt_memory, \
+            opt_cache, opt_cachesize, opt_cacheage, opt_binary, \
+            opt_output, opt_codec, opt_top, \
+            opt_dedup, opt_allocated, opt_distribution, opt_ages, \
+            opt_agedays, opt_progress, opt_stats, opt_profile, \
+            opt_onefs, opt_maxdepth, opt_minsize, opt_maxsize, \
+            opt_newer, opt_older
     extensions = [
             'avi',
             'mpeg',
@@ -85,8 +163,15 @@ def main():
     ]
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:], 'hs:', [
-                'help', 'style=' ])
+        opts, args = getopt.getopt(sys.argv[1:],
+                'hs:j:a:m:c:b:o:z:t:dux:i:p:', [ 'help', 'style=',
+                'jobs=', 'async=', 'memory=', 'cache=', 'cache-size=',
+                'cache-age=', 'binary=', 'output=', 'compress=', 'top=',
+                'dedup', 'allocated', 'exclude=', 'include=',
+                'exclude-regex=', 'include-regex=', 'one-file-system',
+                'max-depth=', 'min-size=', 'max-size=', 'newer=',
+                'older=', 'distribution', 'ages', 'age-days=',
+                'progress=', 'stats=', 'profile=' ])
     except getopt.GetoptError:
         usage()
         sys.exit(1)
@@ -95,6 +180,68 @@ def main():
         if o in ('-s', '--style'):
             if a in ('win', 'unix'):
                 opt_style = a
+        if o in ('-j', '--jobs'):
+            opt_jobs = parseNumber(a, 1)
+        if o in ('-a', '--async'):
+            opt_async = parseNumber(a, 1)
+        if o in ('-m', '--memory'):
+            opt_memory = parseNumber(a, 1)
+        if o in ('-c', '--cache'):
+            opt_cache = a
+        if o in ('--cache-size', ):
+            opt_cachesize = parseNumber(a, 1)
+        if o in ('--cache-age', ):
+            opt_cacheage = parseNumber(a, 0)
+        if o in ('-b', '--binary'):
+            opt_binary = a
+        if o in ('-o', '--output'):
+            opt_output = a
+        if o in ('-z', '--compress'):
+            if not a in compress.codecNames():
+                usage()
+                sys.exit(1)
+            opt_codec = a
+        if o in ('-t', '--top'):
+            opt_top = parseNumber(a, 1)
+        if o in ('-d', '--dedup'):
+            opt_dedup = 1
+        if o in ('-u', '--allocated'):
+            opt_allocated = 1
+        if o in ('--distribution', ):
+            opt_distribution = 1
+        if o in ('--ages', ):
+            opt_ages = 1
+        if o in ('--age-days', ):
+            opt_agedays = ages.parseDays(a)
+            if None == opt_agedays:
+                usage()
+                sys.exit(1)
+        if o in ('-x', '--exclude'):
+            opt_excludes.append(('glob', a))
+        if o in ('--exclude-regex', ):
+            opt_excludes.append(('regex', a))
+        if o in ('-i', '--include'):
+            opt_includes.append(('glob', a))
+        if o in ('--include-regex', ):
+            opt_includes.append(('regex', a))
+        if o in ('--one-file-system', ):
+            opt_onefs = 1
+        if o in ('--max-depth', ):
+            opt_maxdepth = parseNumber(a, 0)
+        if o in ('--min-size', ):
+            opt_minsize = parseNumber(a, 0)
+        if o in ('--max-size', ):
+            opt_maxsize = parseNumber(a, 0)
+        if o in ('--newer', ):
+            opt_newer = parseNumber(a, 1)
+        if o in ('--older', ):
+            opt_older = parseNumber(a, 1)
+        if o in ('-p', '--progress'):
+            opt_progress = parseNumber(a, 1)
+        if o in ('--stats', ):
+            opt_stats = a
+        if o in ('--profile', ):
+            opt_profile = a
         if o in ('-h', '--help'):
             usage()
             sys.exit(1)
@@ -109,78 +256,166 @@ def main():
             sys.exit(3)
         if 1 < len(args):
             extensions = args[1:]
+    if None != opt_cache and 1 < opt_jobs:
+        sys.stderr.write('Error: Options "-c" and "-j" cannot be ' \
+                + 'combined.' + "\r\n")
+        sys.exit(1)
+    if 0 < opt_async and (None != opt_cache or 1 < opt_jobs):
+        sys.stderr.write('Error: Option "-a" cannot be combined with ' \
+                + '"-c" or "-j".' + "\r\n")
+        sys.exit(1)
+    if None != opt_cache and (1 == opt_dedup or 1 == opt_allocated):
+        sys.stderr.write('Error: Option "-c" cannot be combined with ' \
+                + '"-d" or "-u".' + "\r\n")
+        sys.exit(1)
+    if None != opt_cache and (0 < opt_newer or 0 < opt_older):
+        sys.stderr.write('Error: Option "-c" cannot be combined with ' \
+                + '"--newer" or "--older".' + "\r\n")
+        sys.exit(1)
+    if None != opt_cache and 1 == opt_ages:
+        sys.stderr.write('Error: Options "-c" and "--ages" cannot be ' \
+                + 'combined.' + "\r\n")
+        sys.exit(1)
+    if None != opt_binary and (None != opt_output or None != opt_codec):
+        sys.stderr.write('Error: Option "-b" cannot be combined with ' \
+                + '"-o" or "-z".' + "\r\n")
+        sys.exit(1)
+    if None != opt_binary and 1 == opt_allocated:
+        sys.stderr.write('Error: Options "-b" and "-u" cannot be ' \
+                + 'combined.' + "\r\n")
+        sys.exit(1)
+    if None != opt_binary and (1 == opt_distribution or 1 == opt_ages):
+        sys.stderr.write('Error: Option "-b" cannot be combined with ' \
+                + '"--distribution" or "--ages".' + "\r\n")
+        sys.exit(1)
+
+    extensions, opt_allfiles = scan.extensionList(extensions)
+    options = scan.ScanOptions()
+
+    if opt_excludes or opt_includes or 1 == opt_onefs \
+            or 0 <= opt_maxdepth or 0 < opt_minsize or 0 <= opt_maxsize \
+            or 0 < opt_newer or 0 < opt_older:
+        try:
+            options.walk_filter = scan.WalkFilter(basedir,
+                    opt_excludes, opt_includes, opt_onefs, opt_maxdepth,
+                    opt_minsize, opt_maxsize, opt_newer, opt_older)
+        except re.error:
+            sys.stderr.write('Error: Invalid pattern.' + "\r\n")
+            sys.exit(1)
 
-    exts_lowered = [ ]
-    for ext in extensions:
-        exts_lowered.append(ext.lower())
-        if '*' == ext:
-            opt_allfiles = 1
+    cache = None
+    if None != opt_cache:
+        filters = ''
+        if None != options.walk_filter:
+            filters = options.walk_filter.key()
+        try:
+            cache = scan.ScanCache(opt_cache, extensions, opt_allfiles,
+                    opt_cachesize * 1024 * 1024, opt_cacheage * 86400,
+                    filters)
+        except sqlite3.Error:
+            sys.stderr.write('Error: Cannot use cache <' + opt_cache \
+                    + '>' + "\r\n")
+            sys.exit(4)
+
+    if 0 < opt_progress or None != opt_stats:
+        options.scan_stats = scan.ScanStats(opt_progress,
+                SCRIPT_VERSION)
+    if 1 == opt_dedup:
+        options.seen_inodes = scan.SeenInodes()
+    if 1 == opt_allocated:
+        options.allocated_sizes = scan.AllocatedSizes()
+    if 1 == opt_distribution:
+        options.size_distribution = distribution.SizeDistribution(
+                basedir)
+    if 1 == opt_ages:
+        options.file_ages = ages.AgeBuckets(opt_agedays)
+    options.top_files = opt_top
+
+    f_out = None
+    if None != opt_output or None != opt_codec:
+        try:
+            f_out = compress.openOutput(opt_output, opt_codec)
+        except (IOError, compress.CompressionError):
+            sys.stderr.write('Error: Cannot write file <' \
+                    + str(opt_output) + '>' + "\r\n")
+            sys.exit(5)
+        sys.stdout = f_out
+
+    if None != opt_profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(dirStats, basedir, extensions, options,
+                opt_jobs, opt_memory, cache, opt_async)
+        profiler.dump_stats(opt_profile)
+    else:
+        dirStats(basedir, extensions, options, opt_jobs, opt_memory,
+                cache, opt_async)
 
-    dirStats(basedir, exts_lowered, opt_allfiles)
+    if None != f_out:
+        try:
+            f_out.close()
+        except IOError:
+            sys.stderr.write('Error: Cannot write file <' \
+                    + str(opt_output) + '>' + "\r\n")
+            sys.exit(5)
+        sys.stdout = sys.__stdout__
+
+    if None != options.scan_stats:
+        options.scan_stats.finish(opt_stats)
 
 #####################################################################
 
-def dirStats(basedir, extensions, allfiles):
-    files = { }
-    if 0 == allfiles:
-        for ext in extensions:
-            files[ext.lower()] = { }
-        
-    for root, dirlist, filelist in os.walk(basedir):
-        for filename in filelist:
-            fullname = os.path.join(root, filename)
-            if -1 != filename.find('.'):
-                ext = filename.split('.')[-1]
-                if '' == ext:
-                    ext = ' '
-            else:
-                ext = '*'
-            if 1 == allfiles:
-                if not ext.lower() in files:
-                    files[ext.lower()] = { }
-                try:
-                    files[ext.lower()][fullname] = os.stat(fullname).st_size
-                except OSError:
-                    sys.stderr.write('Error stat\'ing <' + fullname \
-                        + '>' + "\r\n")
-            elif ext.lower() in extensions:
-                try:
-                    files[ext.lower()][fullname] = os.stat(fullname).st_size
-                except OSError:
-                    sys.stderr.write('Error stat\'ing <' + fullname \
-                        + '>' + "\r\n")
-
-    kv_sep = ' = '
-    cmt_char = '; '
-    if 'unix' == opt_style:
-        kv_sep = ': '
-        cmt_char = '# '
-
-    print cmt_char + 'created ' + time.asctime() + ' by dir-stats ' \
-            + 'v' + SCRIPT_VERSION
-    print
+def parseNumber(a, minimum):
+    try:
+        number = int(a)
+    except ValueError:
+        number = minimum - 1
+    if minimum > number:
+        usage()
+        sys.exit(1)
+    return number
+
+#####################################################################
+
+def reportHeader():
+    header = 'created ' + time.asctime() + ' by dir-stats v' \
+            + SCRIPT_VERSION
+    if 0 < opt_top:
+        header = header + ', largest ' + str(opt_top) + ' files only'
+    return header
 
-    totalfiles = 0
-    totalsize = 0
-    exts = files.keys()
-    exts.sort()
-    for ext in exts:
-        fcnt = 0
-        scnt = 0
-        print '[' + ext + ']'
-        keys = files[ext].keys()
-        keys.sort()
-        for key in keys:
-            print str(key) + kv_sep + str(files[ext][key])
-            fcnt = fcnt + 1
-            scnt = scnt + files[ext][key]
-        print cmt_char + ext + ': ' + str(fcnt) + ' files, ' \
-                + str(scnt) + ' bytes'
-        print
-        totalfiles = totalfiles + fcnt
-        totalsize = totalsize + scnt
-    print cmt_char + 'total size: ' + str(totalfiles) + ' files, ' + \
-            str(totalsize) + ' bytes'
+#####################################################################
+
+# Scans the tree and prints the report, or writes it to the binary
+# report opt_binary. The time spent writing the report, without the
+# sorting, is counted as the emit phase.
+def dirStats(basedir, extensions, options, jobs = 1, memory = 0,
+        cache = None, inflight = 0):
+    scanned = scan.scanReport(basedir, extensions, jobs, memory, cache,
+            inflight, reportHeader(), options)
+    scan_stats = options.scan_stats
+    try:
+        started = time.time()
+        if None != scan_stats:
+            sorting = scan_stats.phases['sort']
+        if None != opt_binary:
+            writeBinaryStats(opt_binary, scanned)
+        else:
+            report.writeIni(sys.stdout, scanned, opt_style)
+        if None != scan_stats:
+            scan_stats.addTime('emit', time.time() - started \
+                    - (scan_stats.phases['sort'] - sorting))
+    finally:
+        scanned.close()
+
+#####################################################################
+
+def writeBinaryStats(filename, scanned):
+    try:
+        report.writeBinary(filename, scanned)
+    except IOError:
+        sys.stderr.write('Error: Cannot write file <' + filename \
+                + '>' + "\r\n")
+        sys.exit(5)
 
 #####################################################################
 
@@ -197,6 +432,124 @@ def usage():
     print '    Define the style of the output. Accepted values are ' \
             + '"win" and "unix".'
     print '    The default value is "win".'
+    print '  -j COUNT, --jobs=COUNT'
+    print '    Scan the directory tree with COUNT threads. Useful on ' \
+            + 'network'
+    print '    filesystems with a high latency. The default value is 1.'
+    print '  -a COUNT, --async=COUNT'
+    print '    Keep up to COUNT directory listings and stats in flight ' \
+            + 'at once, which'
+    print '    hides the latency of network filesystems even within ' \
+            + 'a single large'
+    print '    directory. Cannot be combined with "-c" or "-j".'
+    print '  -m COUNT, --memory=COUNT'
+    print '    Keep at most COUNT files in memory. Sorted runs of ' \
+            + 'files are written'
+    print '    to temporary files and merged when the report is ' \
+            + 'printed. By default'
+    print '    all files are kept in memory.'
+    print '  -c FILENAME, --cache=FILENAME'
+    print '    Cache the files of every directory in the SQLite ' \
+            + 'database FILENAME.'
+    print '    Directories whose mtime did not change since the last ' \
+            + 'run are not'
+    print '    listed again. Cannot be combined with "-j".'
+    print '  --cache-size=MB'
+    print '    Stop adding directories to the cache once it has ' \
+            + 'grown to MB'
+    print '    megabytes. The default value is 1024.'
+    print '  --cache-age=DAYS'
+    print '    Rescan cached directories that are older than DAYS ' \
+            + 'days. Files that'
+    print '    are modified in place do not change the mtime of ' \
+            + 'their directory'
+    print '    and are only noticed then, so the report may differ ' \
+            + 'from a full scan'
+    print '    by the files modified in place within the last DAYS ' \
+            + 'days. A smaller'
+    print '    value means more directories are listed again. 0 ' \
+            + 'never rescans them.'
+    print '    The default value is 7.'
+    print '  -t COUNT, --top=COUNT'
+    print '    Only report the COUNT largest files. Only COUNT files ' \
+            + 'are kept in'
+    print '    memory while scanning.'
+    print '  -d, --dedup'
+    print '    Count files with several hard links only once. Only the ' \
+            + 'first link found'
+    print '    is reported. Cannot be combined with "-c".'
+    print '  -u, --allocated'
+    print '    Add the number of bytes allocated on disk to the totals ' \
+            + 'of every'
+    print '    section. Cannot be combined with "-b" or "-c".'
+    print '  --distribution'
+    print '    Append the size distribution of every extension and ' \
+            + 'top-level directory'
+    print '    to the report: count, minimum, maximum, mean, ' \
+            + 'percentiles and a'
+    print '    histogram of powers of two. With "-t" it still covers ' \
+            + 'all files.'
+    print '    Cannot be combined with "-b".'
+    print '  --ages'
+    print '    Append the bytes not modified and not accessed for 90, ' \
+            + '180 and 365 days'
+    print '    to the report, per directory and per extension. The ' \
+            + 'times are taken'
+    print '    from the stat() done for the size. With "-t" it still ' \
+            + 'covers all files.'
+    print '    Cannot be combined with "-b" or "-c".'
+    print '  --age-days=DAYS'
+    print '    With "--ages", use the comma separated list DAYS ' \
+            + 'instead of 90,180,365.'
+    print '  -x PATTERN, --exclude=PATTERN'
+    print '    Skip files and directories matching the glob PATTERN. ' \
+            + 'A PATTERN without'
+    print '    a slash is matched against the name, otherwise against ' \
+            + 'the full path.'
+    print '    Excluded directories are not listed at all. May be ' \
+            + 'given repeatedly.'
+    print '  -i PATTERN, --include=PATTERN'
+    print '    Only consider files matching the glob PATTERN. May be ' \
+            + 'given repeatedly.'
+    print '  --exclude-regex=REGEX, --include-regex=REGEX'
+    print '    Like "-x" and "-i", but REGEX is a regular expression ' \
+            + 'searched for in'
+    print '    the full path.'
+    print '  --one-file-system'
+    print '    Do not descend into directories on other filesystems.'
+    print '  --max-depth=DEPTH'
+    print '    Descend at most DEPTH directories below basedir.'
+    print '  --min-size=BYTES, --max-size=BYTES'
+    print '    Only consider files of at least or at most BYTES bytes.'
+    print '  --newer=DAYS, --older=DAYS'
+    print '    Only consider files modified less or more than DAYS ' \
+            + 'days ago. Cannot'
+    print '    be combined with "-c".'
+    print '  -p SECONDS, --progress=SECONDS'
+    print '    Write the progress of the scan to stderr every SECONDS ' \
+            + 'seconds, and the'
+    print '    time spent walking, stat\'ing, sorting and printing at ' \
+            + 'the end.'
+    print '  --stats=FILENAME'
+    print '    Write the counters and timings of the run to the JSON ' \
+            + 'file FILENAME.'
+    print '  --profile=FILENAME'
+    print '    Run the scan under cProfile and save the profile to ' \
+            + 'FILENAME. Threads'
+    print '    started by "-j" are not profiled.'
+    print '  -b FILENAME, --binary=FILENAME'
+    print '    Write a binary report to FILENAME instead of printing ' \
+            + 'the INI report.'
+    print '    Use dir-stats-convert.py to convert between both ' \
+            + 'formats.'
+    print '  -o FILENAME, --output=FILENAME'
+    print '    Write the INI report to FILENAME instead of stdout. ' \
+            + 'FILENAME ending'
+    print '    in .gz, .bz2 or .xz is compressed accordingly.'
+    print '  -z CODEC, --compress=CODEC'
+    print '    Compress the INI report with CODEC. Accepted values ' \
+            + 'are "gzip", "bz2"'
+    print '    and "xz" if the lzma module is available.'
     print
     print '"basedir" is the directory where the script starts to ' \
             + 'search for files.'
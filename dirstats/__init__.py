@@ -0,0 +1,26 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Code shared by the dir-stats scripts.
+#
+# MODULES
+# =======
+#   scan      scanning of directory trees
+#   ages      bytes of old files per directory and extension
+#   report    reading and writing of INI reports, the report interface
+#   binfile   reading and writing of binary reports
+#   summary   summing up reports per directory
+#   diff      comparison of two reports
+#   dupes     finding of duplicate files
+#   distribution
+#             size statistics per extension and directory
+#   html      rendering of reports as HTML and marking of rows
+#   matcher   matching of many keywords at once
+#   compress  transparent compression of reports and HTML files
+#
+# The scripts only parse their options and hand the data from one module
+# to the next, so a pipeline like scan, summary and HTML output can just
+# as well run within a single Python process.
+#
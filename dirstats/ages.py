@@ -0,0 +1,200 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Bytes of files that were not modified or not accessed for a number of
+# days, summed up per directory and per extension while scanning.
+#
+# HOW IT WORKS
+# ============
+# The times are taken from the stat() result the scan needs for the
+# size anyway. A file counts for every age it reaches, so the bytes of a
+# file last modified 200 days ago count for 90 and for 180 days, and
+# the buckets of a directory are just the sum of its files. Directories
+# only hold the files directly within them; summing up subtrees is left
+# to dirstats.summary. Only directories and extensions with at least one
+# old file are kept.
+#
+# REPORT SECTION
+# ==============
+# The buckets are written to the INI report as section SECTION:
+#
+#   days 90 = 90
+#   dir /srv/data modified 90 = 123456
+#   ext iso accessed 365 = 4700000000
+#
+# There is a "days" entry for every age looked at, so an age no file
+# reached is still known to the report. The key of a bucket starts with
+# the kind of the group, "ext" or "dir", and its name, followed by the
+# time looked at and the age in days.
+#
+
+import os.path
+import threading
+import time
+
+#####################################################################
+
+SECTION = '.age'
+
+DEFAULT_DAYS = [ 90, 180, 365 ]
+
+TIMES = [ 'modified', 'accessed' ]
+
+#####################################################################
+
+# Parses a comma separated list of days like "90,180,365". Returns the
+# days sorted, or None if the list is invalid.
+def parseDays(text):
+    try:
+        days = [ int(day) for day in text.split(',') ]
+    except ValueError:
+        return None
+    if 0 == len(days) or 1 > min(days):
+        return None
+    days = list(set(days))
+    days.sort()
+    return days
+
+#####################################################################
+
+# The bytes of all directories and extensions per age, as of now. Every
+# group holds a list with the bytes not modified for days[0], days[1],
+# ... days, followed by the bytes not accessed for as many days. The
+# lock is needed for "-j" and "-a".
+class AgeBuckets(object):
+    def __init__(self, days = DEFAULT_DAYS, now = None):
+        self.lock = threading.Lock()
+        self.days = list(days)
+        self.days.sort()
+        if None == now:
+            now = time.time()
+        self.now = now
+        self.limits = [ now - day * 86400 for day in self.days ]
+        self.groups = { }
+
+    def group(self, kind, name):
+        buckets = self.groups.get((kind, name))
+        if None == buckets:
+            buckets = [ 0 ] * (2 * len(self.days))
+            self.groups[(kind, name)] = buckets
+        return buckets
+
+    def add(self, ext, fullname, size, mtime, atime):
+        if mtime > self.limits[0] and atime > self.limits[0]:
+            return
+        count = len(self.days)
+        hits = [ ]
+        for i in range(count):
+            if mtime <= self.limits[i]:
+                hits.append(i)
+            if atime <= self.limits[i]:
+                hits.append(count + i)
+        dirname = os.path.dirname(fullname)
+        self.lock.acquire()
+        try:
+            for buckets in (self.group('ext', ext),
+                    self.group('dir', dirname)):
+                for i in hits:
+                    buckets[i] += size
+        finally:
+            self.lock.release()
+
+    # Adds the buckets of other for all days known to both.
+    def merge(self, other):
+        pairs = [ ]
+        for i in range(len(other.days)):
+            if other.days[i] in self.days:
+                j = self.days.index(other.days[i])
+                pairs.append((i, j))
+                pairs.append((len(other.days) + i, len(self.days) + j))
+        for key, source in other.groups.iteritems():
+            buckets = self.group(key[0], key[1])
+            for i, j in pairs:
+                buckets[j] += source[i]
+        return self
+
+    # Returns the bucket of the given time and age, or None if day is no
+    # age of these buckets.
+    def bucket(self, which, day):
+        if not day in self.days:
+            return None
+        index = self.days.index(day)
+        if 'accessed' == which:
+            index = index + len(self.days)
+        return index
+
+    # Returns a dictionary of all groups of kind and their bytes not
+    # modified, or not accessed, for day days.
+    def bytesOf(self, kind, day, which = 'modified'):
+        index = self.bucket(which, day)
+        result = { }
+        if None == index:
+            return result
+        for key, buckets in self.groups.iteritems():
+            if kind == key[0] and 0 != buckets[index]:
+                result[key[1]] = buckets[index]
+        return result
+
+    # Returns (kind, name) of all groups, sorted.
+    def groupNames(self):
+        names = self.groups.keys()
+        names.sort()
+        return names
+
+    # Yields the (key, value) entries of the report section listing the
+    # ages looked at.
+    def dayEntries(self):
+        for day in self.days:
+            yield 'days ' + str(day), day
+
+    # Yields the (key, value) entries of the report section for the
+    # group (kind, name), leaving out empty buckets.
+    def entries(self, kind, name):
+        prefix = kind + ' ' + name + ' '
+        buckets = self.groups[(kind, name)]
+        for which in TIMES:
+            for day in self.days:
+                value = buckets[self.bucket(which, day)]
+                if 0 != value:
+                    yield prefix + which + ' ' + str(day), value
+
+#####################################################################
+
+# Splits the key of an entry into kind, name, time and age. Returns None
+# if the key is no entry of the age buckets.
+def splitKey(key):
+    parts = key.rsplit(' ', 2)
+    if 3 != len(parts) or not parts[1] in TIMES \
+            or not parts[2].isdigit():
+        return None
+    kind = parts[0].split(' ', 1)
+    if 2 != len(kind) or not kind[0] in ('ext', 'dir'):
+        return None
+    return kind[0], kind[1], parts[1], int(parts[2])
+
+#####################################################################
+
+# Reads the age buckets from the (key, value) entries of SECTION.
+# Entries that are not understood are skipped. Reports without "days"
+# entries only know the ages of the buckets they hold.
+def readAges(items):
+    entries = [ ]
+    days = set()
+    for key, value in items:
+        parts = key.split(' ')
+        if 2 == len(parts) and 'days' == parts[0] \
+                and parts[1].isdigit() and 0 < int(parts[1]):
+            days.add(int(parts[1]))
+            continue
+        parts = splitKey(key)
+        if None != parts and 0 < parts[3]:
+            entries.append((parts, value))
+            days.add(parts[3])
+    if 0 == len(days):
+        days = DEFAULT_DAYS
+    result = AgeBuckets(days, 0)
+    for (kind, name, which, day), value in entries:
+        result.group(kind, name)[result.bucket(which, day)] = value
+    return result
@@ -0,0 +1,220 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Reading and writing of binary dir-stats reports.
+#
+# FORMAT
+# ======
+# A binary report holds the same data as the INI report of dir-stats.py,
+# stored in columns so it can be memory-mapped and read without any
+# parsing. All numbers are little-endian.
+#
+#   magic       8 bytes, "DSTATBIN"
+#   version     uint32, currently 1
+#   flags       uint32, currently 0
+#   nsections   uint32
+#   headerlen   uint32
+#   nfiles      uint64
+#   bloblen     uint64
+#   header      headerlen bytes, e.g. "created ... by dir-stats v1.1.0"
+#   sections    nsections times: uint32 namelen, uint64 first file,
+#               uint64 number of files, namelen bytes name
+#   padding     up to the next multiple of 8
+#   offsets     (nfiles + 1) uint64, offsets of the paths in the blob
+#   sizes       nfiles int64, file sizes
+#   exts        nfiles uint32, section index of every file
+#   blob        bloblen bytes, all paths concatenated
+#
+# Sections are sorted by name and the files of a section are sorted by
+# path, so the files of section i are the range first..first+count-1.
+#
+
+import mmap
+import os
+import struct
+import tempfile
+
+#####################################################################
+
+MAGIC = 'DSTATBIN'
+VERSION = 1
+
+HEADER = struct.Struct('<8sIIIIQQ')
+SECTION = struct.Struct('<IQQ')
+
+CHUNK = 4096
+
+#####################################################################
+
+class BinaryFormatError(ValueError):
+    pass
+
+#####################################################################
+
+def isBinaryFile(filename):
+    try:
+        f = open(filename, 'rb')
+    except IOError:
+        return False
+    try:
+        return MAGIC == f.read(len(MAGIC))
+    finally:
+        f.close()
+
+#####################################################################
+
+# Writes a binary report. Sections have to be started in sorted order by
+# calling section() and the files of a section have to be added in
+# sorted order. The columns are collected in temporary files and copied
+# into the report by close().
+class BinaryWriter(object):
+    def __init__(self, filename, header):
+        self.filename = filename
+        self.header = header
+        self.sections = [ ]
+        self.nfiles = 0
+        self.bloblen = 0
+        self.columns = [ tempfile.TemporaryFile(prefix='dir-stats-') \
+                for i in range(4) ]
+        self.offsets = [ 0 ]
+        self.sizes = [ ]
+        self.exts = [ ]
+        self.paths = [ ]
+
+    def section(self, name):
+        self.sections.append([ name, self.nfiles, 0 ])
+
+    def add(self, path, size):
+        self.bloblen = self.bloblen + len(path)
+        self.offsets.append(self.bloblen)
+        self.sizes.append(size)
+        self.exts.append(len(self.sections) - 1)
+        self.paths.append(path)
+        self.sections[-1][2] = self.sections[-1][2] + 1
+        self.nfiles = self.nfiles + 1
+        if CHUNK <= len(self.sizes):
+            self.flush()
+
+    def flush(self):
+        n = len(self.sizes)
+        self.columns[0].write(struct.pack('<%dQ' % len(self.offsets),
+                *self.offsets))
+        self.columns[1].write(struct.pack('<%dq' % n, *self.sizes))
+        self.columns[2].write(struct.pack('<%dI' % n, *self.exts))
+        self.columns[3].write(''.join(self.paths))
+        self.offsets = [ ]
+        self.sizes = [ ]
+        self.exts = [ ]
+        self.paths = [ ]
+
+    def close(self):
+        self.flush()
+        f = open(self.filename, 'wb')
+        try:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.sections),
+                    len(self.header), self.nfiles, self.bloblen))
+            f.write(self.header)
+            length = HEADER.size + len(self.header)
+            for name, first, count in self.sections:
+                f.write(SECTION.pack(len(name), first, count))
+                f.write(name)
+                length = length + SECTION.size + len(name)
+            f.write('\0' * (-length % 8))
+            for column in self.columns:
+                column.seek(0)
+                while True:
+                    data = column.read(1024 * 1024)
+                    if '' == data:
+                        break
+                    f.write(data)
+        finally:
+            f.close()
+            for column in self.columns:
+                column.close()
+
+#####################################################################
+
+# Memory-maps a binary report. Only the header and the section table
+# are read when the report is opened; paths and sizes are read from the
+# mapping while iterating over a section.
+class BinaryReader(object):
+    def __init__(self, filename):
+        self.f = open(filename, 'rb')
+        length = os.fstat(self.f.fileno()).st_size
+        if length < HEADER.size:
+            self.f.close()
+            raise BinaryFormatError('file is too short')
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.parse(length)
+        except (BinaryFormatError, struct.error):
+            self.close()
+            raise BinaryFormatError('file is truncated or corrupt')
+
+    def parse(self, length):
+        magic, version, flags, nsections, headerlen, self.nfiles, \
+                bloblen = HEADER.unpack_from(self.mm, 0)
+        if MAGIC != magic:
+            raise BinaryFormatError('no binary dir-stats report')
+        if VERSION != version:
+            raise BinaryFormatError('unsupported version ' + str(version))
+        pos = HEADER.size
+        self.header = self.mm[pos:pos + headerlen]
+        pos = pos + headerlen
+        self.sections = [ ]
+        self.index = { }
+        for i in range(nsections):
+            namelen, first, count = SECTION.unpack_from(self.mm, pos)
+            pos = pos + SECTION.size
+            name = self.mm[pos:pos + namelen]
+            pos = pos + namelen
+            self.index[name] = len(self.sections)
+            self.sections.append((name, first, count))
+        pos = pos + (-pos % 8)
+        self.offpos = pos
+        self.sizepos = self.offpos + 8 * (self.nfiles + 1)
+        self.extpos = self.sizepos + 8 * self.nfiles
+        self.blobpos = self.extpos + 4 * self.nfiles
+        if self.blobpos + bloblen != length:
+            raise BinaryFormatError('file is truncated or corrupt')
+
+    def sectionNames(self):
+        return [ section[0] for section in self.sections ]
+
+    def count(self, name):
+        return self.sections[self.index[name]][2]
+
+    # Returns the number of files and their total size for the section
+    # name, reading the size column only.
+    def totals(self, name):
+        name, first, count = self.sections[self.index[name]]
+        total = 0
+        end = first + count
+        while first < end:
+            n = min(CHUNK, end - first)
+            total = total + sum(struct.unpack_from('<%dq' % n, self.mm,
+                    self.sizepos + 8 * first))
+            first = first + n
+        return count, total
+
+    # Yields (path, size) for all files of the section name.
+    def items(self, name):
+        name, first, count = self.sections[self.index[name]]
+        end = first + count
+        while first < end:
+            n = min(CHUNK, end - first)
+            offsets = struct.unpack_from('<%dQ' % (n + 1), self.mm,
+                    self.offpos + 8 * first)
+            sizes = struct.unpack_from('<%dq' % n, self.mm,
+                    self.sizepos + 8 * first)
+            blobpos = self.blobpos
+            for i in xrange(n):
+                yield self.mm[blobpos + offsets[i]:blobpos \
+                        + offsets[i + 1]], sizes[i]
+            first = first + n
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
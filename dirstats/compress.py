@@ -0,0 +1,196 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Transparent compression of the reports and HTML files written and read
+# by the dir-stats scripts.
+#
+# CODECS
+# ======
+# gzip and bz2 are always available. xz needs the lzma module, which is
+# part of Python 3.3 and newer and available as backports.lzma for
+# Python 2.
+#
+# When writing, the codec is either given explicitly or chosen by the
+# suffix of the file name: ".gz", ".bz2" and ".xz". When reading, the
+# codec is detected from the first bytes of the file, so the suffix does
+# not matter. Compressed files are always streamed through the
+# decompressor and never loaded as a whole.
+#
+
+import bz2
+import gzip
+import io
+import sys
+import zlib
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+#####################################################################
+
+SUFFIXES = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+MAGICS = [
+    ('\x1f\x8b', 'gzip'),
+    ('BZh', 'bz2'),
+    ('\xfd7zXZ\x00', 'xz'),
+]
+
+BUFFER = 256 * 1024
+
+#####################################################################
+
+class CompressionError(ValueError):
+    pass
+
+#####################################################################
+
+# Returns the names of the codecs usable with this Python.
+def codecNames():
+    names = [ 'gzip', 'bz2' ]
+    if None != lzma:
+        names.append('xz')
+    return names
+
+#####################################################################
+
+def codecFromSuffix(filename):
+    for suffix in SUFFIXES:
+        if filename.endswith(suffix):
+            return SUFFIXES[suffix]
+    return None
+
+#####################################################################
+
+def suffixOf(codec):
+    for suffix in SUFFIXES:
+        if codec == SUFFIXES[suffix]:
+            return suffix
+    return ''
+
+#####################################################################
+
+# Returns the codec of the file filename or None if it is not compressed.
+def detectCodec(filename):
+    f = open(filename, 'rb')
+    try:
+        start = f.read(6)
+    finally:
+        f.close()
+    for magic, codec in MAGICS:
+        if start.startswith(magic):
+            return codec
+    return None
+
+#####################################################################
+
+def checkCodec(codec):
+    if not codec in codecNames():
+        raise CompressionError('codec ' + str(codec) \
+                + ' is not available')
+
+#####################################################################
+
+# Opens filename for reading, decompressing it on the fly if needed. The
+# returned object supports iteration, readline() and seek(); seeking
+# backwards in a compressed file starts decompressing from the beginning.
+# GzipFile splits lines in Python, so it is wrapped into a BufferedReader
+# doing that in C.
+def openRead(filename):
+    codec = detectCodec(filename)
+    if None == codec:
+        return open(filename, 'r')
+    checkCodec(codec)
+    if 'gzip' == codec:
+        return io.BufferedReader(gzip.GzipFile(filename, 'rb'), BUFFER)
+    if 'bz2' == codec:
+        return bz2.BZ2File(filename, 'rb')
+    return lzma.LZMAFile(filename, 'rb')
+
+#####################################################################
+
+# Opens filename for writing. Without an explicit codec it is taken from
+# the suffix of filename; a file without a known suffix is not
+# compressed.
+def openWrite(filename, codec = None, buffering = -1):
+    if None == codec:
+        codec = codecFromSuffix(filename)
+    if None == codec:
+        return open(filename, 'w', buffering)
+    checkCodec(codec)
+    return CompressedWriter(open(filename, 'wb'), codec)
+
+#####################################################################
+
+# Opens the output of a script: the file filename, or stdout if filename
+# is None. Stdout is only compressed if a codec is given and is never
+# closed.
+def openOutput(filename, codec = None):
+    if None != filename:
+        return openWrite(filename, codec)
+    if None == codec:
+        return sys.stdout
+    return CompressedWriter(sys.stdout, codec, False)
+
+#####################################################################
+
+# Compresses everything written to it into the file object f_out, which
+# may as well be sys.stdout. Small writes are collected and compressed
+# in chunks of BUFFER bytes. close() finishes the compressed stream and
+# closes f_out if closing is set.
+class CompressedWriter(object):
+    def __init__(self, f_out, codec, closing = True):
+        checkCodec(codec)
+        self.f_out = f_out
+        self.closing = closing
+        self.softspace = 0
+        if 'gzip' == codec:
+            self.compressor = zlib.compressobj(6, zlib.DEFLATED,
+                    16 + zlib.MAX_WBITS)
+        elif 'bz2' == codec:
+            self.compressor = bz2.BZ2Compressor()
+        else:
+            self.compressor = lzma.LZMACompressor()
+        self.pending = [ ]
+        self.size = 0
+
+    def write(self, data):
+        self.pending.append(data)
+        self.size = self.size + len(data)
+        if self.size >= BUFFER:
+            self.compress()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def compress(self):
+        data = self.compressor.compress(''.join(self.pending))
+        if '' != data:
+            self.f_out.write(data)
+        self.pending = [ ]
+        self.size = 0
+
+    def flush(self):
+        self.f_out.flush()
+
+    def close(self):
+        if None == self.compressor:
+            return
+        self.compress()
+        self.f_out.write(self.compressor.flush())
+        self.compressor = None
+        self.f_out.flush()
+        if self.closing:
+            self.f_out.close()
@@ -0,0 +1,182 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Comparison of two reports, the engine behind dir-stats-diff.py.
+#
+# HOW IT WORKS
+# ============
+# Both reports keep the entries of every section sorted by path. The
+# sections of the same name are walked through side by side, like the
+# merge step of a merge sort, so only the current entry of either report
+# is held in memory. The changed files are spooled to temporary files;
+# only the change of every section and every directory that changed at
+# all is kept in memory.
+# Reports created by dir-stats-summary.py list directories instead of
+# files and name their single section after the report. If both reports
+# are such summaries, their sections are compared regardless of their
+# names and every entry counts as a directory of its own.
+#
+
+import marshal
+import os
+import tempfile
+
+#####################################################################
+
+# Returns True if report was created by dir-stats-summary.py.
+def isSummary(report):
+    return -1 != report.header.find(' by dir-stats-summary ')
+
+#####################################################################
+
+# Returns pairs of (old section, new section) to compare, with None for
+# a section that only exists in one of the reports. With summaries set,
+# the single sections of both reports are paired whatever their names.
+def sectionPairs(old, new, summaries = 0):
+    old_names = old.sectionNames()
+    new_names = new.sectionNames()
+    if summaries and 1 == len(old_names) and 1 == len(new_names):
+        return [ (old_names[0], new_names[0]) ]
+    names = list(set(old_names) | set(new_names))
+    names.sort()
+    pairs = [ ]
+    for name in names:
+        old_name = None
+        new_name = None
+        if name in old_names:
+            old_name = name
+        if name in new_names:
+            new_name = name
+        pairs.append((old_name, new_name))
+    return pairs
+
+#####################################################################
+
+# Yields the entries of section in report sorted by path, or nothing if
+# the section does not exist in report.
+def sectionItems(report, section):
+    if None == section:
+        return iter([ ])
+    return report.items(section)
+
+#####################################################################
+
+def nextItem(items):
+    try:
+        return items.next()
+    except StopIteration:
+        return None
+
+#####################################################################
+
+# Collects the changes found while merging. Changed files go to one
+# temporary file per kind of change, the changes per section and per
+# directory are summed up in memory. items() yields (path, size) of the
+# files added or removed and (path, delta) of the files resized. Changes
+# added with listed unset only count for the sections and directories.
+# With summaries set, every path is a directory itself.
+class DiffResult(object):
+    KINDS = [ 'added', 'removed', 'resized' ]
+
+    def __init__(self, summaries = 0):
+        self.summaries = summaries
+        self.spools = { }
+        self.counts = { }
+        self.totals = { }
+        for kind in self.KINDS:
+            self.spools[kind] = tempfile.TemporaryFile(
+                    prefix='dir-stats-')
+            self.counts[kind] = 0
+            self.totals[kind] = 0
+        self.sections = { }
+        self.dirs = { }
+
+    def add(self, kind, section, path, size, delta, listed = True):
+        if listed:
+            marshal.dump((path, size), self.spools[kind])
+            self.counts[kind] = self.counts[kind] + 1
+            self.totals[kind] = self.totals[kind] + size
+        self.sections[section] = self.sections.get(section, 0) + delta
+        dirname = path
+        if not self.summaries:
+            dirname = os.path.dirname(path)
+        self.dirs[dirname] = self.dirs.get(dirname, 0) + delta
+
+    def items(self, kind):
+        spool = self.spools[kind]
+        spool.seek(0)
+        while True:
+            try:
+                yield marshal.load(spool)
+            except EOFError:
+                break
+
+    # Adds the change of every directory to all of its parents.
+    def rollup(self):
+        dirs = { }
+        for dirname, delta in self.dirs.iteritems():
+            while True:
+                dirs[dirname] = dirs.get(dirname, 0) + delta
+                parent = os.path.dirname(dirname)
+                if parent == dirname:
+                    break
+                dirname = parent
+        self.dirs = dirs
+
+    def total(self):
+        return sum(self.sections.values())
+
+    def close(self):
+        for kind in self.KINDS:
+            self.spools[kind].close()
+
+#####################################################################
+
+# Compares the reports old and new and returns a DiffResult. Resized
+# files are only listed if their size changed by at least limit bytes,
+# but their change always counts for their section and directory. With
+# recursive set, the change of every directory is added to all of its
+# parents. If both reports were created by dir-stats-summary.py, their
+# entries are taken as directories.
+def diffReports(old, new, limit = 1, recursive = 0):
+    summaries = 0
+    if isSummary(old) and isSummary(new):
+        summaries = 1
+    result = DiffResult(summaries)
+    try:
+        for old_section, new_section in sectionPairs(old, new, summaries):
+            section = new_section
+            if None == section:
+                section = old_section
+            diffSection(result, section, sectionItems(old, old_section),
+                    sectionItems(new, new_section), limit)
+        if 1 == recursive:
+            result.rollup()
+    except:
+        result.close()
+        raise
+    return result
+
+#####################################################################
+
+# Merges the sorted entries of both sections. Entries with the same path
+# are compared, all others only exist in one of the sections.
+def diffSection(result, section, old_items, new_items, limit = 1):
+    old = nextItem(old_items)
+    new = nextItem(new_items)
+    while None != old or None != new:
+        if None == new or (None != old and old[0] < new[0]):
+            result.add('removed', section, old[0], old[1], -old[1])
+            old = nextItem(old_items)
+        elif None == old or new[0] < old[0]:
+            result.add('added', section, new[0], new[1], new[1])
+            new = nextItem(new_items)
+        else:
+            delta = new[1] - old[1]
+            if 0 != delta:
+                result.add('resized', section, new[0], delta, delta,
+                        abs(delta) >= limit)
+            old = nextItem(old_items)
+            new = nextItem(new_items)
@@ -0,0 +1,236 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Size statistics collected while scanning: count, total, smallest and
+# largest file, a histogram of powers of two and percentiles, per
+# extension and per top-level directory.
+#
+# HOW IT WORKS
+# ============
+# Every group of files keeps a fixed amount of counters, no matter how
+# many files are added. Bucket n of the log2 histogram counts the files
+# of 2^(n-1) up to 2^n - 1 bytes, bucket 0 the empty files.
+# The percentiles come from a sketch with logarithmic buckets: bucket i
+# counts the files of GAMMA^(i-1) up to GAMMA^i bytes, so every
+# percentile is off by ACCURACY, i.e. 1%, plus the rounding to whole
+# bytes. Files up to 1 PiB take at most about 1750 buckets, and only the
+# buckets that were hit are kept.
+# All counters are plain sums, so merging two distributions, from the
+# workers of a scan or from several reports, gives exactly the same
+# result as collecting all files at once.
+#
+# REPORT SECTION
+# ==============
+# A distribution is written to the INI report as section SECTION, with
+# an entry for every counter:
+#
+#   ext avi count = 3          dir /usr/lib min = 0
+#   ext avi log2 11 = 2        dir /usr/lib sketch 693 = 1
+#
+# The key starts with the kind of the group, "ext" or "dir", and its
+# name; the counter and the number of the bucket come last, so names may
+# contain spaces. readDistribution() reads these entries back.
+#
+
+import math
+import os
+import threading
+
+#####################################################################
+
+SECTION = '.distribution'
+
+ACCURACY = 0.01
+GAMMA = (1 + ACCURACY) / (1 - ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+PERCENTILES = [ 50, 90, 99 ]
+
+#####################################################################
+
+# The size statistics of a single group of files.
+class SizeStats(object):
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.smallest = 0
+        self.largest = 0
+        self.log2 = [ 0 ] * 65
+        self.sketch = { }
+
+    def add(self, size):
+        self.count = self.count + 1
+        self.total = self.total + size
+        if 1 == self.count or size < self.smallest:
+            self.smallest = size
+        if size > self.largest:
+            self.largest = size
+        self.log2[size.bit_length()] += 1
+        if 0 < size:
+            index = int(math.ceil(math.log(size) / LOG_GAMMA))
+            self.sketch[index] = self.sketch.get(index, 0) + 1
+
+    def merge(self, other):
+        if 0 == other.count:
+            return
+        if 0 == self.count or other.smallest < self.smallest:
+            self.smallest = other.smallest
+        if other.largest > self.largest:
+            self.largest = other.largest
+        self.count = self.count + other.count
+        self.total = self.total + other.total
+        for n in range(len(self.log2)):
+            self.log2[n] += other.log2[n]
+        for index, count in other.sketch.iteritems():
+            self.sketch[index] = self.sketch.get(index, 0) + count
+
+    def mean(self):
+        if 0 == self.count:
+            return 0
+        return self.total / self.count
+
+    # Returns the size that percent percent of the files do not exceed.
+    # Empty files are counted by log2 bucket 0, the sketch holds all
+    # others.
+    def percentile(self, percent):
+        if 0 == self.count:
+            return 0
+        rank = max(0, (percent * self.count + 99) / 100 - 1)
+        seen = self.log2[0]
+        if rank < seen:
+            return 0
+        indices = self.sketch.keys()
+        indices.sort()
+        for index in indices:
+            seen = seen + self.sketch[index]
+            if rank < seen:
+                size = int(round(2 * GAMMA ** index / (GAMMA + 1)))
+                return max(self.smallest, min(self.largest, size))
+        return self.largest
+
+    # Yields (counter, value) for every counter that is not 0.
+    def counters(self):
+        yield 'count', self.count
+        yield 'total', self.total
+        yield 'min', self.smallest
+        yield 'max', self.largest
+        for n in range(len(self.log2)):
+            if 0 != self.log2[n]:
+                yield 'log2 ' + str(n), self.log2[n]
+        indices = self.sketch.keys()
+        indices.sort()
+        for index in indices:
+            yield 'sketch ' + str(index), self.sketch[index]
+
+    def setCounter(self, counter, index, value):
+        if 'count' == counter:
+            self.count = value
+        elif 'total' == counter:
+            self.total = value
+        elif 'min' == counter:
+            self.smallest = value
+        elif 'max' == counter:
+            self.largest = value
+        elif 'log2' == counter and 0 <= index < len(self.log2):
+            self.log2[index] = value
+        elif 'sketch' == counter and None != index:
+            self.sketch[index] = value
+
+    # Returns a line like "3 files, min 10, max 1000, mean 400, ...".
+    def describe(self):
+        text = str(self.count) + ' files, min ' + str(self.smallest) \
+                + ', max ' + str(self.largest) + ', mean ' \
+                + str(self.mean())
+        for percent in PERCENTILES:
+            text = text + ', p' + str(percent) + ' ' \
+                    + str(self.percentile(percent))
+        return text
+
+#####################################################################
+
+# The size statistics of all extensions and top-level directories below
+# basedir. Files directly within basedir count for basedir itself. The
+# lock is needed for "-j" and "-a".
+class SizeDistribution(object):
+    def __init__(self, basedir = ''):
+        self.lock = threading.Lock()
+        self.groups = { }
+        self.basedir = basedir
+        self.start = len(basedir)
+        if not basedir.endswith(os.sep):
+            self.start = self.start + 1
+
+    def group(self, kind, name):
+        stats = self.groups.get((kind, name))
+        if None == stats:
+            stats = SizeStats()
+            self.groups[(kind, name)] = stats
+        return stats
+
+    def topDir(self, fullname):
+        pos = fullname.find(os.sep, self.start)
+        if -1 == pos:
+            return self.basedir
+        return fullname[:pos]
+
+    def add(self, ext, fullname, size):
+        top = self.topDir(fullname)
+        self.lock.acquire()
+        try:
+            self.group('ext', ext).add(size)
+            self.group('dir', top).add(size)
+        finally:
+            self.lock.release()
+
+    def merge(self, other):
+        for key, stats in other.groups.iteritems():
+            self.group(key[0], key[1]).merge(stats)
+        return self
+
+    # Returns (kind, name) of all groups, sorted.
+    def groupNames(self):
+        names = self.groups.keys()
+        names.sort()
+        return names
+
+    # Yields the (key, value) entries of the report section for the
+    # group (kind, name).
+    def entries(self, kind, name):
+        prefix = kind + ' ' + name + ' '
+        for counter, value in self.groups[(kind, name)].counters():
+            yield prefix + counter, value
+
+#####################################################################
+
+# Splits the key of an entry into kind, name, counter and bucket index.
+# Returns None if the key is no entry of a distribution.
+def splitKey(key):
+    parts = key.rsplit(' ', 2)
+    index = None
+    if 3 == len(parts) and parts[2].lstrip('-').isdigit():
+        prefix, counter, index = parts[0], parts[1], int(parts[2])
+    else:
+        parts = key.rsplit(' ', 1)
+        if 2 != len(parts):
+            return None
+        prefix, counter = parts
+    parts = prefix.split(' ', 1)
+    if 2 != len(parts) or not parts[0] in ('ext', 'dir'):
+        return None
+    return parts[0], parts[1], counter, index
+
+#####################################################################
+
+# Reads a distribution from the (key, value) entries of SECTION.
+# Entries that are not understood are skipped.
+def readDistribution(items):
+    distribution = SizeDistribution()
+    for key, value in items:
+        parts = splitKey(key)
+        if None == parts:
+            continue
+        kind, name, counter, index = parts
+        distribution.group(kind, name).setCounter(counter, index, value)
+    return distribution
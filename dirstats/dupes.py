@@ -0,0 +1,248 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Finding of duplicate files, the engine behind dir-stats-dupes.py.
+#
+# HOW IT WORKS
+# ============
+# Files are narrowed down in stages, every stage only looking at the
+# files the previous one could not tell apart:
+#
+#   1. The files of the reports are grouped by size. The reports are
+#      read twice, first counting the sizes, then keeping the paths of
+#      sizes seen more than once only.
+#   2. The candidates are stat'ed. Further links to an inode already
+#      seen are dropped, as they take no space of their own, and so are
+#      files whose size changed since the report was written.
+#   3. The first and the last PARTIAL bytes of every candidate are
+#      hashed. For files of up to 2 * PARTIAL bytes this is the whole
+#      file, so they are done.
+#   4. The remaining files of the same size and partial hash are hashed
+#      completely, reading CHUNK bytes at a time.
+#
+# No file is read unless another file of the same size exists, and no
+# file is read completely unless another one starts and ends with the
+# same bytes. The reads of every stage are spread over a number of
+# threads, so slow disks and network filesystems are kept busy.
+#
+
+import collections
+import hashlib
+import os
+import sys
+import threading
+import Queue
+
+from dirstats import report
+
+#####################################################################
+
+PARTIAL = 4096
+CHUNK = 1024 * 1024
+
+#####################################################################
+
+# A set of identical files. paths are sorted; all but the first one
+# could be removed.
+DuplicateSet = collections.namedtuple('DuplicateSet', 'size digest paths')
+
+def reclaimable(dupes):
+    return dupes.size * (len(dupes.paths) - 1)
+
+#####################################################################
+
+# Runs function(*task) for every task with jobs threads and returns the
+# results in the order of the tasks. Every result is stored at the index
+# of its task, so the workers need no lock.
+def runTasks(function, tasks, jobs):
+    results = [ None ] * len(tasks)
+    if 1 >= jobs or 1 >= len(tasks):
+        for i in xrange(len(tasks)):
+            results[i] = function(*tasks[i])
+        return results
+
+    pending = Queue.Queue()
+    for i in xrange(len(tasks)):
+        pending.put(i)
+    workers = [ ]
+    for i in range(min(jobs, len(tasks))):
+        worker = threading.Thread(target=taskWorker, args=(function,
+                tasks, pending, results))
+        worker.setDaemon(True)
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+    return results
+
+def taskWorker(function, tasks, pending, results):
+    while True:
+        try:
+            i = pending.get_nowait()
+        except Queue.Empty:
+            break
+        results[i] = function(*tasks[i])
+
+#####################################################################
+
+# Groups the files of all reports by size. Files below minsize are left
+# out. Returns a list of (size, paths) for every size shared by several
+# files. counts receives the number of files looked at.
+def sizeGroups(reports, minsize = 1, counts = None):
+    sizes = { }
+    files = 0
+    for source in reports:
+        for path, size in report.reportItems(source):
+            if size >= minsize:
+                sizes[size] = sizes.get(size, 0) + 1
+                files = files + 1
+    if None != counts:
+        counts['files'] = files
+
+    groups = { }
+    for source in reports:
+        for path, size in report.reportItems(source):
+            if 1 < sizes.get(size, 0):
+                groups.setdefault(size, [ ]).append(path)
+    return [ (size, paths) for size, paths in groups.iteritems() ]
+
+#####################################################################
+
+def readError(path):
+    sys.stderr.write('Error reading <' + path + '>' + "\r\n")
+
+#####################################################################
+
+# Returns the inode of path, or None if it cannot be stat'ed or its
+# size is no longer size.
+def statCandidate(path, size):
+    try:
+        st = os.stat(path)
+    except OSError:
+        readError(path)
+        return None
+    if size != st.st_size:
+        return None
+    return st.st_dev, st.st_ino
+
+#####################################################################
+
+# Returns the hash of the first and the last PARTIAL bytes of path along
+# with the number of bytes read, or None if path cannot be read.
+def partialDigest(path, size):
+    try:
+        f = open(path, 'rb')
+        try:
+            data = f.read(PARTIAL)
+            digest = hashlib.sha1(data)
+            nread = len(data)
+            if size > 2 * PARTIAL:
+                f.seek(size - PARTIAL)
+            if size > PARTIAL:
+                data = f.read(PARTIAL)
+                digest.update(data)
+                nread = nread + len(data)
+        finally:
+            f.close()
+    except (IOError, OSError):
+        readError(path)
+        return None
+    return digest.hexdigest(), nread
+
+#####################################################################
+
+# Returns the hash of the whole file path along with the number of bytes
+# read, or None if path cannot be read. The file is read in chunks of
+# CHUNK bytes without any further buffering.
+def fullDigest(path, size):
+    try:
+        f = open(path, 'rb', 0)
+        try:
+            digest = hashlib.sha1()
+            nread = 0
+            while True:
+                data = f.read(CHUNK)
+                if '' == data:
+                    break
+                digest.update(data)
+                nread = nread + len(data)
+        finally:
+            f.close()
+    except (IOError, OSError):
+        readError(path)
+        return None
+    return digest.hexdigest(), nread
+
+#####################################################################
+
+# Drops the files that are gone or changed and all but the first link
+# of every inode from groups.
+def dropLinks(groups, jobs):
+    tasks = [ (path, size) for size, paths in groups for path in paths ]
+    inodes = runTasks(statCandidate, tasks, jobs)
+    result = [ ]
+    i = 0
+    for size, paths in groups:
+        seen = set()
+        kept = [ ]
+        for path in paths:
+            inode = inodes[i]
+            i = i + 1
+            if None != inode and not inode in seen:
+                seen.add(inode)
+                kept.append(path)
+        if 1 < len(kept):
+            result.append((size, kept))
+    return result
+
+#####################################################################
+
+# Hashes every file of groups with function and splits the groups by
+# hash. Returns (size, digest, paths) for every hash shared by several
+# files. counts receives the number of bytes read. The files are read
+# sorted by path, which keeps the reads of a directory close together.
+def splitGroups(groups, function, jobs, counts):
+    tasks = [ (path, size) for size, paths in groups for path in paths ]
+    tasks.sort()
+    digests = runTasks(function, tasks, jobs)
+    split = { }
+    for (path, size), digest in zip(tasks, digests):
+        if None == digest:
+            continue
+        counts['read'] = counts['read'] + digest[1]
+        split.setdefault((size, digest[0]), [ ]).append(path)
+    return [ (size, digest, paths) \
+            for (size, digest), paths in split.iteritems() \
+            if 1 < len(paths) ]
+
+#####################################################################
+
+# Finds the duplicate files of all reports, reading them with jobs
+# threads. Files below minsize are ignored. Returns a list of
+# DuplicateSet, those with the most reclaimable bytes first. If counts
+# is given, it receives the number of files looked at, the number and
+# size of the candidates sharing their size with another file and the
+# number of bytes read.
+def findDuplicates(reports, jobs = 4, minsize = 1, counts = None):
+    if None == counts:
+        counts = { }
+    counts['read'] = 0
+    groups = sizeGroups(reports, max(1, minsize), counts)
+    groups = dropLinks(groups, jobs)
+    counts['candidates'] = sum([ len(paths) for size, paths in groups ])
+    counts['bytes'] = sum([ size * len(paths) for size, paths in groups ])
+
+    groups = splitGroups(groups, partialDigest, jobs, counts)
+    done = [ group for group in groups if group[0] <= 2 * PARTIAL ]
+    groups = [ (size, paths) for size, digest, paths in groups \
+            if size > 2 * PARTIAL ]
+    done.extend(splitGroups(groups, fullDigest, jobs, counts))
+
+    result = [ ]
+    for size, digest, paths in done:
+        paths.sort()
+        result.append(DuplicateSet(size, digest, paths))
+    result.sort(key=lambda dupes: (-reclaimable(dupes), dupes.paths))
+    return result
@@ -0,0 +1,162 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Rendering of reports as XHTML, the engine behind dir-stats-ini2html.py
+# and dir-stats-htmlmarker.py.
+#
+# HOW IT WORKS
+# ============
+# writeHtml() writes a table for every section of a report, as read by
+# the readers of dirstats.report. Rows whose path contains one of the
+# words of a WordMatcher are marked while they are written.
+# Every table row is written on a line of its own, so markLines() can
+# mark the rows of an existing HTML file line by line, without parsing
+# the whole document.
+#
+
+import re
+import time
+
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import unescape
+
+#####################################################################
+
+ROW = '<tr class="%s"><td>%s</td><td align="right">%s</td><td>%s</td>' \
+        + '</tr>\n'
+
+ROW_PATTERN = re.compile(r'^<tr class="([^"]*)"><td>([^<]*)</td>' \
+        + r'<td align="right">[^<]*</td><td>[^<]*</td></tr>$')
+
+#####################################################################
+
+# Writes a complete HTML file with a table for every section of report
+# to f_out. creator names the script in the trailer, matcher is a
+# WordMatcher or None.
+def writeHtml(f_out, report, title, creator, matcher = None):
+    writeHtmlLeader(f_out, title)
+    for section in report.sectionNames():
+        files_total, size_total = report.totals(section)
+        writeTable(f_out, section, files_total, size_total,
+                report.items(section), 0, matcher)
+    writeHtmlTrailer(f_out, creator)
+
+#####################################################################
+
+def writeHtmlLeader(f, title):
+    title = escape(title)
+
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 ' \
+            + 'Transitional//EN" ' \
+            + '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n')
+    f.write('<html xmlns="http://www.w3.org/1999/xhtml">\n')
+    f.write('<head>\n')
+    f.write('<meta http-equiv="Content-Type" content="' \
+            + 'text/html; charset=UTF-8" />\n')
+    f.write('<title>' + title + '</title>\n')
+    f.write('<style type="text/css">\n')
+    f.write('html, body { background-color: #fff; color: #000; }\n')
+    f.write('caption { text-align: center; font-size: 150%; ' \
+            + 'font-weight: bold }\n')
+    f.write('th { text-align: center; font-weight: bold; }\n')
+    f.write('tr.teven td { background-color: #eee; color: #000; }\n')
+    f.write('tr.todd td { }\n')
+    f.write('tr.mark td { background-color: #ff0; color: #000; }\n')
+    f.write('tfoot td { text-align: center; }\n')
+    f.write('</style>\n')
+    f.write('</head>\n')
+    f.write('<body>\n')
+    f.write('<h1>' + title + '</h1>\n')
+
+#####################################################################
+
+def writeHtmlTrailer(f, creator):
+    f.write('<hr />\n')
+    f.write('<div align="right"><em>Created ' \
+            + escape(time.asctime()) + ' by ' + escape(creator) \
+            + '</em></div>\n')
+    f.write('</body>\n')
+    f.write('</html>')
+
+#####################################################################
+
+# Writes the table of a section. items yields the rows to write, row is
+# the number of the first row within the section.
+def writeTable(f_out, section, files_total, size_total, items, row,
+        matcher = None):
+    f_out.write('<hr />\n')
+    f_out.write('<table width="100%">\n')
+    f_out.write('<caption>' + escape(section) + '</caption>\n')
+    f_out.write('<colgroup>\n')
+    f_out.write('<col width="88%" />\n')
+    f_out.write('<col width="10%" />\n')
+    f_out.write('<col width="2%" />\n')
+    f_out.write('</colgroup>\n')
+    f_out.write('<thead>\n')
+    f_out.write('<tr><th>File</th><th>Size</th><th>Unit</th></tr>\n')
+    f_out.write('</thead>\n')
+    size, unit = computeSizeAndUnit(size_total)
+    f_out.write('<tfoot>\n')
+    f_out.write('<tr><td colspan="3">' + escape(section) \
+            + ': ' + str(files_total) + ' objects, ' + size \
+            + ' ' + unit + '</td></tr>\n')
+    f_out.write('</tfoot>\n')
+    f_out.write('<tbody>\n')
+    if 0 == files_total:
+        f_out.write('<tr><td colspan="3" align="center">No ' \
+                + 'matching files found.</td></tr>\n')
+    writeRows(f_out, items, row, matcher)
+    f_out.write('</tbody>\n')
+    f_out.write('</table>\n')
+
+#####################################################################
+
+def writeRows(f_out, items, row, matcher = None):
+    if None != matcher and 0 == len(matcher):
+        matcher = None
+    write = f_out.write
+    for option, fsize in items:
+        if 0 == (row % 2):
+            colo = 'teven'
+        else:
+            colo = 'todd'
+        if None != matcher and None != matcher.match(option):
+            colo += ' mark'
+        size, unit = computeSizeAndUnit(fsize)
+        write(ROW % (colo, escape(option), size, unit))
+        row = row + 1
+
+#####################################################################
+
+def computeSizeAndUnit(fsize):
+    if not isinstance(fsize, (int, long)):
+        fsize = int(fsize)
+
+    if fsize > (1024 * 1024 * 1024):
+        return [ '%.2f' % (float(fsize) / 1024 / 1024 / 1024), 'GiB' ]
+    elif fsize > (1024 * 1024):
+        return [ '%.2f' % (float(fsize) / 1024 / 1024), 'MiB' ]
+    elif fsize > 1024:
+        return [ '%.2f' % (float(fsize) / 1024), 'KiB' ]
+    else:
+        return [ str(fsize), 'B' ]
+
+#####################################################################
+
+# Yields the lines of an HTML file written by writeHtml(), with the
+# rows whose file name contains one of the words of matcher marked.
+# Only the class attribute of a marked row is changed. If counts is
+# given, it counts the rows marked by every word.
+def markLines(lines, matcher, counts = None):
+    for line in lines:
+        row = ROW_PATTERN.match(line)
+        if None != row:
+            word = matcher.match(unescape(row.group(2)))
+            if None != word:
+                line = line[:row.end(1)] + ' mark' + line[row.end(1):]
+                if None != counts:
+                    counts[word] = counts.get(word, 0) + 1
+        yield line
@@ -0,0 +1,72 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Case-insensitive matching of many keywords at once.
+#
+# HOW IT WORKS
+# ============
+# The keywords are lowered and put into a trie, which is turned into a
+# single regular expression like "a(?:bc|x)|foo". The regular expression
+# engine then checks all keywords in one pass over the name, so matching
+# does not get slower with every keyword added. A keyword that starts
+# with another keyword is dropped from the trie, as the shorter keyword
+# matches whenever the longer one does.
+#
+
+import re
+
+#####################################################################
+
+class WordMatcher(object):
+    def __init__(self, words):
+        self.words = { }
+        self.always = None
+        trie = { }
+        for word in words:
+            lowered = word.lower()
+            if not self.words.has_key(lowered):
+                self.words[lowered] = word
+            if '' == lowered and None == self.always:
+                self.always = word
+            node = trie
+            for char in lowered:
+                if node.has_key(''):
+                    break
+                node = node.setdefault(char, { })
+            else:
+                node.clear()
+                node[''] = { }
+
+        self.regex = None
+        if 0 < len(trie) and None == self.always:
+            self.regex = re.compile(self.trieRegex(trie))
+
+    def trieRegex(self, node):
+        if node.has_key(''):
+            return ''
+        alternatives = [ ]
+        chars = node.keys()
+        chars.sort()
+        for char in chars:
+            alternatives.append(re.escape(char) \
+                    + self.trieRegex(node[char]))
+        if 1 == len(alternatives):
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    def __len__(self):
+        return len(self.words)
+
+    # Returns the keyword found in name or None. If several keywords are
+    # found, the one that starts first in name is returned.
+    def match(self, name):
+        if None != self.always:
+            return self.always
+        if None == self.regex:
+            return None
+        found = self.regex.search(name.lower())
+        if None == found:
+            return None
+        return self.words[found.group(0)]
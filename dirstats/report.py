@@ -0,0 +1,368 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Reading and writing of the reports created by dir-stats.py and
+# dir-stats-summary.py.
+#
+# REPORTS
+# =======
+# All reports are read the same way, no matter if they come from an INI
+# file, a binary file or straight from a scan:
+#
+#   header           the first comment of the report, or ''
+#   sectionNames()   the names of all sections, sorted
+#   totals(name)     the number of files and their total size
+#   items(name)      yields (path, size) sorted by path
+#   close()          releases the file or temporary files
+#
+# This is implemented by IniReader, MemoryReport, binfile.BinaryReader
+# and scan.ScanReport, so the output of one step can be handed to the
+# next one without writing it to a file in between.
+#
+# INI FORMAT
+# ==========
+# Section headers, comments starting with ';' or '#' and entries
+# separated by '=' or ':'. As the value is always a number, an entry is
+# split at the last separator, so paths may contain ':' and '='
+# themselves. Values that are no number count as 0 bytes.
+# Sections whose name starts with '.' hold no files, but data like the
+# size distribution of dirstats.distribution or the ages of
+# dirstats.ages. They are not listed by sectionNames(); extensions never
+# contain a '.'.
+#
+
+import time
+
+from dirstats import ages
+from dirstats import binfile
+from dirstats import compress
+from dirstats import distribution
+
+#####################################################################
+
+class ReportError(ValueError):
+    pass
+
+#####################################################################
+
+# Returns the separator of keys and values and the comment prefix of
+# the INI style, which is either "win" or "unix".
+def outputStyle(style):
+    if 'unix' == style:
+        return ': ', '# '
+    return ' = ', '; '
+
+#####################################################################
+
+def splitLine(line):
+    pos = max(line.rfind('='), line.rfind(':'))
+    if -1 == pos:
+        return None, None
+    return line[:pos].rstrip(), line[pos + 1:].strip()
+
+#####################################################################
+
+def toNumber(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+#####################################################################
+
+def isFileSection(name):
+    return not name.startswith('.')
+
+#####################################################################
+
+# Yields (path, size) for every entry of the INI file f_in in a single
+# pass, in the order of the file. Sections that hold no files are
+# skipped. Raises ReportError if the file is no report.
+def iniItems(f_in, filename):
+    in_section = 0
+    for line in f_in:
+        line = line.strip()
+        if '' == line or line[0] in ';#':
+            continue
+        if '[' == line[0] and ']' == line[-1]:
+            in_section = 1
+            if not isFileSection(line[1:-1]):
+                in_section = 2
+            continue
+        key, value = splitLine(line)
+        if None == key or 0 == in_section:
+            raise ReportError(filename + ' is no report')
+        if 1 == in_section:
+            yield key, toNumber(value)
+
+#####################################################################
+
+# Reads an INI report without loading it into memory. A first pass
+# records the offset, the number of entries and the total size of every
+# section; items() then seeks to the section and streams its entries.
+# The reports are written sorted, so the entries are streamed as they
+# are. A section that is not sorted or that appears more than once is
+# read into memory and sorted. distribution and ages hold the size
+# distribution and the ages of the report, or None. Raises ReportError
+# if the file is no report.
+class IniReader(object):
+    def __init__(self, f_in, filename):
+        self.f_in = f_in
+        self.header = ''
+        self.sections = { }
+        section = None
+        last = None
+        offset = 0
+        for line in f_in:
+            if 0 == offset and line[:1] in (';', '#'):
+                self.header = line[1:].strip()
+            offset = offset + len(line)
+            line = line.strip()
+            if '' == line or line[0] in ';#':
+                continue
+            if '[' == line[0] and ']' == line[-1]:
+                name = line[1:-1]
+                if self.sections.has_key(name):
+                    section = self.sections[name]
+                    section[3] = 0
+                else:
+                    section = [ [ ], 0, 0, 1 ]
+                    self.sections[name] = section
+                section[0].append(offset)
+                last = None
+                continue
+            key, value = splitLine(line)
+            if None == section or None == key:
+                raise ReportError(filename + ' is no report')
+            if None != last and key <= last:
+                section[3] = 0
+            last = key
+            try:
+                value = int(value)
+            except ValueError:
+                value = 0
+            section[1] = section[1] + 1
+            section[2] = section[2] + value
+        self.distribution = None
+        if self.sections.has_key(distribution.SECTION):
+            self.distribution = distribution.readDistribution(
+                    self.items(distribution.SECTION))
+        self.ages = None
+        if self.sections.has_key(ages.SECTION):
+            self.ages = ages.readAges(self.items(ages.SECTION))
+
+    def sectionNames(self):
+        sections = filter(isFileSection, self.sections.keys())
+        sections.sort()
+        return sections
+
+    def totals(self, section):
+        return self.sections[section][1], self.sections[section][2]
+
+    def readSection(self, offset):
+        self.f_in.seek(offset)
+        while True:
+            line = self.f_in.readline()
+            if '' == line:
+                break
+            line = line.strip()
+            if '' == line or line[0] in ';#':
+                continue
+            if '[' == line[0] and ']' == line[-1]:
+                break
+            pos = max(line.rfind('='), line.rfind(':'))
+            try:
+                yield line[:pos].rstrip(), int(line[pos + 1:])
+            except ValueError:
+                yield line[:pos].rstrip(), 0
+
+    def items(self, section):
+        offsets, count, total, is_sorted = self.sections[section]
+        if 1 == is_sorted:
+            for item in self.readSection(offsets[0]):
+                yield item
+            return
+        entries = { }
+        for offset in offsets:
+            for key, value in self.readSection(offset):
+                entries[key] = value
+        keys = entries.keys()
+        keys.sort()
+        for key in keys:
+            yield key, entries[key]
+
+    def close(self):
+        self.f_in.close()
+
+#####################################################################
+
+# A report held in memory. sections maps the name of every section to a
+# dictionary of paths and sizes.
+class MemoryReport(object):
+    def __init__(self, sections, header = ''):
+        self.sections = sections
+        self.header = header
+
+    def sectionNames(self):
+        sections = self.sections.keys()
+        sections.sort()
+        return sections
+
+    def totals(self, section):
+        entries = self.sections[section]
+        return len(entries), sum(entries.itervalues())
+
+    def items(self, section):
+        entries = self.sections[section]
+        keys = entries.keys()
+        keys.sort()
+        for key in keys:
+            yield key, entries[key]
+
+    def close(self):
+        pass
+
+#####################################################################
+
+# Opens the INI or binary report filename. INI reports may be
+# compressed. Raises IOError, binfile.BinaryFormatError,
+# compress.CompressionError or ReportError if the report cannot be read.
+def openReport(filename):
+    if binfile.isBinaryFile(filename):
+        return binfile.BinaryReader(filename)
+    f_in = compress.openRead(filename)
+    try:
+        return IniReader(f_in, filename)
+    except:
+        f_in.close()
+        raise
+
+#####################################################################
+
+# Yields (path, size) for every entry of all sections of report.
+def reportItems(report):
+    for section in report.sectionNames():
+        for item in report.items(section):
+            yield item
+
+#####################################################################
+
+# Yields (path, size) for every entry of the report filename. INI
+# reports are read in a single pass, so the entries of a section that
+# appears more than once are not merged.
+def fileItems(filename):
+    if binfile.isBinaryFile(filename):
+        reader = binfile.BinaryReader(filename)
+        try:
+            for item in reportItems(reader):
+                yield item
+        finally:
+            reader.close()
+        return
+
+    f_in = compress.openRead(filename)
+    try:
+        for item in iniItems(f_in, filename):
+            yield item
+    finally:
+        f_in.close()
+
+#####################################################################
+
+# Writes report as INI report in the given style: the header, a section
+# for every extension closed by a comment with its totals, and the
+# grand total. The totals are counted while writing, so every section
+# is read only once. If report has allocated sizes, they are added to
+# the comments; if it has a size distribution or ages, they are written
+# last.
+def writeIni(f_out, report, style = 'win'):
+    kv_sep, cmt_char = outputStyle(style)
+    allocated = getattr(report, 'allocated', None)
+    write = f_out.write
+    if '' != report.header:
+        write(cmt_char + report.header + '\n\n')
+
+    totalfiles = 0
+    totalsize = 0
+    for section in report.sectionNames():
+        fcnt = 0
+        scnt = 0
+        write('[' + section + ']\n')
+        for key, size in report.items(section):
+            write(str(key) + kv_sep + str(size) + '\n')
+            fcnt = fcnt + 1
+            scnt = scnt + size
+        comment = cmt_char + section + ': ' + str(fcnt) + ' files, ' \
+                + str(scnt) + ' bytes'
+        if None != allocated:
+            comment = comment + ', ' + str(allocated.get(section, 0)) \
+                    + ' bytes allocated'
+        write(comment + '\n\n')
+        totalfiles = totalfiles + fcnt
+        totalsize = totalsize + scnt
+    comment = cmt_char + 'total size: ' + str(totalfiles) + ' files, ' \
+            + str(totalsize) + ' bytes'
+    if None != allocated:
+        comment = comment + ', ' + str(sum(allocated.values())) \
+                + ' bytes allocated'
+    write(comment + '\n')
+    sizes = getattr(report, 'distribution', None)
+    if None != sizes:
+        writeDistribution(f_out, sizes, style)
+    buckets = getattr(report, 'ages', None)
+    if None != buckets:
+        writeAges(f_out, buckets, style)
+
+#####################################################################
+
+# Writes the size distribution sizes as section distribution.SECTION.
+# The counters of every group are followed by a comment with its
+# statistics.
+def writeDistribution(f_out, sizes, style = 'win'):
+    kv_sep, cmt_char = outputStyle(style)
+    write = f_out.write
+    write('\n[' + distribution.SECTION + ']\n')
+    separator = ''
+    for kind, name in sizes.groupNames():
+        write(separator)
+        for key, value in sizes.entries(kind, name):
+            write(key + kv_sep + str(value) + '\n')
+        write(cmt_char + kind + ' ' + name + ': ' \
+                + sizes.groups[(kind, name)].describe() + '\n')
+        separator = '\n'
+
+#####################################################################
+
+# Writes the age buckets as section ages.SECTION, followed by the
+# bytes of all extensions per age.
+def writeAges(f_out, buckets, style = 'win'):
+    kv_sep, cmt_char = outputStyle(style)
+    write = f_out.write
+    write('\n[' + ages.SECTION + ']\n')
+    if 0 < buckets.now:
+        write(cmt_char + 'ages as of ' + time.asctime(
+                time.localtime(buckets.now)) + '\n')
+    for key, value in buckets.dayEntries():
+        write(key + kv_sep + str(value) + '\n')
+    for kind, name in buckets.groupNames():
+        for key, value in buckets.entries(kind, name):
+            write(key + kv_sep + str(value) + '\n')
+    for which in ages.TIMES:
+        for day in buckets.days:
+            total = sum(buckets.bytesOf('ext', day, which).values())
+            write(cmt_char + 'not ' + which + ' for ' + str(day) \
+                    + ' days: ' + str(total) + ' bytes\n')
+
+#####################################################################
+
+# Writes report as binary report to filename. Raises IOError if the
+# file cannot be written.
+def writeBinary(filename, report):
+    writer = binfile.BinaryWriter(filename, report.header)
+    for section in report.sectionNames():
+        writer.section(section)
+        for key, size in report.items(section):
+            writer.add(key, size)
+    writer.close()
@@ -0,0 +1,1319 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Scanning of directory trees, the engine behind dir-stats.py.
+#
+# HOW IT WORKS
+# ============
+# scanReport() walks a tree with one of the scanners and returns a
+# ScanReport, which is read like a BinaryReader or an IniReader: by
+# sectionNames(), totals() and items(). scanFiles() yields a FileRecord
+# for every matching file instead, in the order the files are found.
+#
+# The optional parts of a scan are switched on by handing a ScanOptions
+# to scanReport() or scanFiles(), just like dir-stats.py does. Each scan
+# only uses the objects of its own options, so several scans can run in
+# the same process.
+#
+
+import array
+import collections
+import fnmatch
+import heapq
+import json
+import marshal
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import Queue
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+#####################################################################
+
+FileRecord = collections.namedtuple('FileRecord', 'path size ext')
+
+#####################################################################
+
+# The optional parts of a scan. Every part left at None is switched off:
+#
+#   scan_stats       a ScanStats counting directories, files and time
+#   seen_inodes      a SeenInodes to count hard linked files only once
+#   allocated_sizes  an AllocatedSizes summing up the allocated sizes
+#   size_distribution
+#                    a distribution.SizeDistribution collecting size
+#                    statistics of all files found
+#   file_ages        an ages.AgeBuckets summing up the bytes of old files
+#   walk_filter      a WalkFilter pruning directories and files
+#   top_files        only keep the top_files largest files if not 0
+#
+class ScanOptions(object):
+    def __init__(self, scan_stats = None, seen_inodes = None,
+            allocated_sizes = None, size_distribution = None,
+            file_ages = None, walk_filter = None, top_files = 0):
+        self.scan_stats = scan_stats
+        self.seen_inodes = seen_inodes
+        self.allocated_sizes = allocated_sizes
+        self.size_distribution = size_distribution
+        self.file_ages = file_ages
+        self.walk_filter = walk_filter
+        self.top_files = top_files
+
+#####################################################################
+
+# Counts directories, stat() calls, files and bytes and the time spent in
+# the phases of a run. Every interval seconds the progress is written to
+# stderr; a final summary is written once the report is done. Workers of
+# "-j" update the counters concurrently, so every update takes the lock.
+# version is saved along with the counters.
+class ScanStats(object):
+    PHASES = [ 'walk', 'stat', 'sort', 'emit' ]
+
+    def __init__(self, interval, version = ''):
+        self.interval = interval
+        self.version = version
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.last = self.started
+        self.dirs = 0
+        self.stats = 0
+        self.files = 0
+        self.bytes = 0
+        self.path = ''
+        self.phases = { }
+        for phase in self.PHASES:
+            self.phases[phase] = 0.0
+
+    def addDir(self, path, seconds):
+        self.lock.acquire()
+        try:
+            self.dirs = self.dirs + 1
+            self.path = path
+            self.phases['walk'] = self.phases['walk'] + seconds
+            if 0 < self.interval:
+                now = time.time()
+                if now - self.last >= self.interval:
+                    self.last = now
+                    self.report(now)
+        finally:
+            self.lock.release()
+
+    def addStat(self, seconds):
+        self.lock.acquire()
+        try:
+            self.stats = self.stats + 1
+            self.phases['stat'] = self.phases['stat'] + seconds
+        finally:
+            self.lock.release()
+
+    def addFile(self, size):
+        self.lock.acquire()
+        try:
+            self.files = self.files + 1
+            self.bytes = self.bytes + size
+        finally:
+            self.lock.release()
+
+    def addTime(self, phase, seconds):
+        self.lock.acquire()
+        try:
+            self.phases[phase] = self.phases[phase] + seconds
+        finally:
+            self.lock.release()
+
+    def report(self, now):
+        elapsed = max(now - self.started, 1e-9)
+        sys.stderr.write('%d dirs (%.0f/s), %d files (%.0f/s), ' \
+                '%d bytes, %s\n' % (self.dirs, self.dirs / elapsed,
+                self.files, self.files / elapsed, self.bytes, self.path))
+
+    # Writes the final counters and phase timings to stderr if progress
+    # was requested, and to the JSON file filename if given. With "-j"
+    # the walk and stat times are summed up over all workers.
+    def finish(self, filename):
+        now = time.time()
+        if 0 < self.interval:
+            self.report(now)
+            sys.stderr.write('total %.3f s' % (now - self.started))
+            for phase in self.PHASES:
+                sys.stderr.write(', ' + phase + ' %.3f s' \
+                        % self.phases[phase])
+            sys.stderr.write('\n')
+        if None == filename:
+            return
+        data = {
+            'version': self.version,
+            'started': self.started,
+            'seconds': now - self.started,
+            'dirs': self.dirs,
+            'stats': self.stats,
+            'files': self.files,
+            'bytes': self.bytes,
+            'phases': self.phases,
+        }
+        try:
+            f = open(filename, 'w')
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.close()
+        except IOError:
+            sys.stderr.write('Error: Cannot write file <' + filename \
+                    + '>' + "\r\n")
+
+#####################################################################
+
+# A list of glob and regex patterns. Globs without a slash are matched
+# against the name of an entry, all other globs against its full path.
+# Regexes are searched for anywhere in the full path.
+class PatternSet(object):
+    def __init__(self, patterns):
+        self.names = [ ]
+        self.paths = [ ]
+        for kind, pattern in patterns:
+            if 'regex' == kind:
+                self.paths.append(re.compile(pattern).search)
+                continue
+            match = re.compile(fnmatch.translate(pattern)).match
+            if '/' in pattern or os.sep in pattern:
+                self.paths.append(match)
+            else:
+                self.names.append(match)
+
+    def __len__(self):
+        return len(self.names) + len(self.paths)
+
+    def matches(self, name, fullname):
+        for match in self.names:
+            if match(name):
+                return True
+        for match in self.paths:
+            if match(fullname):
+                return True
+        return False
+
+#####################################################################
+
+# Decides which directories are descended into and which files are
+# considered at all. Directories are pruned from the listing of their
+# parent, so an excluded subtree is never listed. Exclude patterns apply
+# to directories and files, include patterns to files only. The size and
+# age limits are checked once a file has been stat'ed.
+# excludes and includes are lists of ('glob', pattern) and ('regex',
+# pattern); an invalid regex raises re.error. A maxdepth or maxsize below
+# 0 and a newer or older of 0 days mean no limit.
+class WalkFilter(object):
+    def __init__(self, basedir, excludes = [ ], includes = [ ], onefs = 0,
+            maxdepth = -1, minsize = 0, maxsize = -1, newer = 0,
+            older = 0):
+        self.patterns = (excludes, includes)
+        self.excludes = PatternSet(excludes)
+        self.includes = PatternSet(includes)
+        self.onefs = onefs
+        self.maxdepth = maxdepth
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.base = len(basedir.rstrip(os.sep))
+        self.device = None
+        if 1 == onefs:
+            self.device = os.stat(basedir).st_dev
+        now = time.time()
+        self.newer = None
+        if 0 < newer:
+            self.newer = now - newer * 86400
+        self.older = None
+        if 0 < older:
+            self.older = now - older * 86400
+
+    # Identifies the settings that influence the files found, for the
+    # cache.
+    def key(self):
+        return repr((self.patterns, self.onefs, self.maxdepth,
+                self.minsize, self.maxsize))
+
+    def prune(self, root, listing):
+        subdirs, filelist = listing
+        if 0 <= self.maxdepth \
+                and root[self.base:].count(os.sep) >= self.maxdepth:
+            subdirs = [ ]
+        if self.excludes or None != self.device:
+            subdirs = [ subdir for subdir in subdirs
+                    if self.descend(subdir) ]
+        if self.excludes or self.includes:
+            filelist = [ item for item in filelist
+                    if self.considers(item[1], item[0]) ]
+        return subdirs, filelist
+
+    def descend(self, subdir):
+        if self.excludes.matches(os.path.basename(subdir), subdir):
+            return False
+        if None == self.device:
+            return True
+        try:
+            return self.device == os.lstat(subdir).st_dev
+        except OSError:
+            return False
+
+    def considers(self, filename, fullname):
+        if self.excludes.matches(filename, fullname):
+            return False
+        if self.includes and not self.includes.matches(filename,
+                fullname):
+            return False
+        return True
+
+    def accepts(self, st):
+        if st.st_size < self.minsize:
+            return False
+        if 0 <= self.maxsize and st.st_size > self.maxsize:
+            return False
+        if None != self.newer and st.st_mtime < self.newer:
+            return False
+        if None != self.older and st.st_mtime > self.older:
+            return False
+        return True
+
+#####################################################################
+
+def listDir(root, options):
+    if None == options.scan_stats:
+        listing = readDir(root)
+    else:
+        started = time.time()
+        listing = readDir(root)
+        options.scan_stats.addDir(root, time.time() - started)
+    if None != options.walk_filter:
+        return options.walk_filter.prune(root, listing)
+    return listing
+
+#####################################################################
+
+# Returns the subdirectories and the files of the directory root. Files
+# are returned as (fullname, filename, entry) with entry being the
+# DirEntry of the file or None if scandir() is not available. Symlinks to
+# directories are not returned as subdirectories, just like os.walk()
+# does not follow them.
+def readDir(root):
+    subdirs = [ ]
+    filelist = [ ]
+    if None == scandir:
+        try:
+            names = os.listdir(root)
+        except OSError:
+            return subdirs, filelist
+        for filename in names:
+            fullname = os.path.join(root, filename)
+            if os.path.isdir(fullname):
+                if not os.path.islink(fullname):
+                    subdirs.append(fullname)
+            else:
+                filelist.append((fullname, filename, None))
+        return subdirs, filelist
+
+    try:
+        entries = scandir(root)
+    except OSError:
+        return subdirs, filelist
+    for entry in entries:
+        filename = entry.name
+        fullname = os.path.join(root, filename)
+        try:
+            isdir = entry.is_dir()
+        except OSError:
+            isdir = False
+        if isdir:
+            if not entry.is_symlink():
+                subdirs.append(fullname)
+        else:
+            filelist.append((fullname, filename, entry))
+    return subdirs, filelist
+
+#####################################################################
+
+# Yields (fullname, filename, entry) for every file below basedir.
+# Directories are recognized from the directory listing itself, so no
+# extra stat() is needed.
+def walkTree(basedir, options):
+    pending = [ basedir ]
+    while pending:
+        subdirs, filelist = listDir(pending.pop(), options)
+        pending.extend(subdirs)
+        for item in filelist:
+            yield item
+
+#####################################################################
+
+def fileSize(fullname, entry, options):
+    return fileStat(fullname, entry, options).st_size
+
+#####################################################################
+
+def fileStat(fullname, entry, options):
+    if None == options.scan_stats:
+        return statEntry(fullname, entry)
+    started = time.time()
+    try:
+        return statEntry(fullname, entry)
+    finally:
+        options.scan_stats.addStat(time.time() - started)
+
+#####################################################################
+
+def statEntry(fullname, entry):
+    if None == entry:
+        return os.stat(fullname)
+    return entry.stat()
+
+#####################################################################
+
+# Returns an array of size unsigned 8 byte integers, all 0, or a list if
+# there is no such array type.
+def inodeArray(size):
+    for typecode in ('Q', 'L'):
+        try:
+            slots = array.array(typecode)
+        except ValueError:
+            continue
+        if 8 == slots.itemsize:
+            return array.array(typecode, [ 0 ]) * size
+    return [ 0 ] * size
+
+#####################################################################
+
+# A set of inode numbers in an open addressing hash table: a single array
+# of 8 byte integers, searched by linear probing from a slot given by the
+# middle bits of the inode times HASH_FACTOR. Free slots hold 0, so inode
+# 0 is remembered by a flag. The table is doubled whenever it gets two
+# thirds full, so it takes between 12 and 24 bytes per inode.
+class InodeTable(object):
+    HASH_FACTOR = 0x9E3779B1
+
+    def __init__(self, size = 1024):
+        self.slots = inodeArray(size)
+        self.mask = size - 1
+        self.used = 0
+        self.zero = False
+
+    # Adds ino and returns True, or returns False if ino is known.
+    def add(self, ino):
+        if 0 == ino:
+            known = self.zero
+            self.zero = True
+            return not known
+        slots = self.slots
+        mask = self.mask
+        i = ((ino * self.HASH_FACTOR) >> 16) & mask
+        while 0 != slots[i]:
+            if ino == slots[i]:
+                return False
+            i = (i + 1) & mask
+        slots[i] = ino
+        self.used = self.used + 1
+        if 3 * self.used > 2 * len(self.slots):
+            self.grow()
+        return True
+
+    def grow(self):
+        slots = inodeArray(2 * len(self.slots))
+        mask = len(slots) - 1
+        factor = self.HASH_FACTOR
+        for ino in self.slots:
+            if 0 != ino:
+                i = ((ino * factor) >> 16) & mask
+                while 0 != slots[i]:
+                    i = (i + 1) & mask
+                slots[i] = ino
+        self.slots = slots
+        self.mask = mask
+
+#####################################################################
+
+# Remembers the inodes of files with more than one hard link, so every
+# inode is counted only once. Files with a single link cannot show up
+# twice and are not remembered at all. The inodes are kept in an
+# InodeTable per device rather than a set, which would take 60 bytes and
+# more per inode on snapshot trees where nearly every file has several
+# links. The lock is needed for "-j" and "-a".
+class SeenInodes(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.devices = { }
+
+    # Returns True if st is the first link of its inode.
+    def first(self, st):
+        if 2 > st.st_nlink:
+            return True
+        self.lock.acquire()
+        try:
+            inodes = self.devices.get(st.st_dev)
+            if None == inodes:
+                inodes = InodeTable()
+                self.devices[st.st_dev] = inodes
+            return inodes.add(st.st_ino)
+        finally:
+            self.lock.release()
+
+#####################################################################
+
+# Sums up the allocated size of the reported files per extension.
+class AllocatedSizes(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = { }
+
+    def add(self, ext, size):
+        self.lock.acquire()
+        try:
+            self.totals[ext] = self.totals.get(ext, 0) + size
+        finally:
+            self.lock.release()
+
+    def total(self, ext):
+        return self.totals.get(ext, 0)
+
+#####################################################################
+
+# Returns the number of bytes allocated for st. Sparse files take less
+# than their size, small files usually a bit more.
+def allocatedSize(st):
+    blocks = getattr(st, 'st_blocks', None)
+    if None == blocks:
+        return st.st_size
+    return blocks * 512
+
+#####################################################################
+
+def fileExtension(filename):
+    if -1 != filename.find('.'):
+        ext = filename.split('.')[-1]
+        if '' == ext:
+            ext = ' '
+    else:
+        ext = '*'
+    return ext.lower()
+
+#####################################################################
+
+# Picks an array type for file sizes with 64 bits. Python 2 knows no
+# 'q', and 'l' has only 32 bits on some platforms; a double still holds
+# sizes of up to 8 PiB exactly.
+def sizeArray():
+    for typecode in ('q', 'l'):
+        try:
+            sizes = array.array(typecode)
+        except ValueError:
+            continue
+        if 8 == sizes.itemsize:
+            return sizes
+    return array.array('d')
+
+#####################################################################
+
+# The files of a single extension, stored in columns: the index of the
+# directory of every file, the offset of its name within names and its
+# size.
+class FileColumns(object):
+    __slots__ = ('dirs', 'offsets', 'names', 'sizes')
+
+    def __init__(self):
+        self.dirs = array.array('I')
+        self.offsets = array.array('L')
+        self.names = bytearray()
+        self.sizes = sizeArray()
+
+    def name(self, i):
+        if i + 1 < len(self.offsets):
+            return str(self.names[self.offsets[i]:self.offsets[i + 1]])
+        return str(self.names[self.offsets[i]:])
+
+#####################################################################
+
+# Keeps the found files in memory in a compact form. Every directory is
+# stored only once in a table; the files of every extension are kept in
+# the arrays of a FileColumns object. A file takes about 20 bytes plus
+# the length of its name, a fraction of what a dictionary of full paths
+# takes.
+# items() yields the files of an extension sorted by their full path,
+# which is done on indices: the files are grouped by directory, the
+# directories are visited in sorted order and the files of every
+# directory are sorted by name. The files of a directory are interleaved
+# with those of its subdirectories, just like sorting the full paths
+# would do. The time spent sorting is counted by scan_stats if given.
+class CompactFiles(object):
+    def __init__(self, scan_stats = None):
+        self.scan_stats = scan_stats
+        self.prefixes = [ ]
+        self.prefix_ids = { }
+        self.sections = { }
+        self.order = None
+        self.ranks = None
+
+    # Returns the index of the directory prefix, which includes the
+    # trailing separator.
+    def intern(self, prefix):
+        index = self.prefix_ids.get(prefix)
+        if None == index:
+            index = len(self.prefixes)
+            self.prefixes.append(prefix)
+            self.prefix_ids[prefix] = index
+            self.ranks = None
+        return index
+
+    def add(self, ext, fullname, size):
+        section = self.sections.get(ext)
+        if None == section:
+            section = FileColumns()
+            self.sections[ext] = section
+        pos = fullname.rfind(os.sep) + 1
+        section.dirs.append(self.intern(fullname[:pos]))
+        section.offsets.append(len(section.names))
+        section.names.extend(fullname[pos:])
+        section.sizes.append(size)
+
+    def absorb(self, other):
+        ids = [ self.intern(prefix) for prefix in other.prefixes ]
+        for ext in other.sections:
+            source = other.sections[ext]
+            section = self.sections.get(ext)
+            if None == section:
+                section = FileColumns()
+                self.sections[ext] = section
+            base = len(section.names)
+            section.dirs.extend([ ids[d] for d in source.dirs ])
+            section.offsets.extend([ base + offset \
+                    for offset in source.offsets ])
+            section.names.extend(source.names)
+            section.sizes.extend(source.sizes)
+
+    def exts(self):
+        return self.sections.keys()
+
+    def totals(self, ext):
+        section = self.sections.get(ext)
+        if None == section:
+            return 0, 0
+        return len(section.sizes), int(sum(section.sizes))
+
+    # Returns the sorted directory prefixes along with the rank of every
+    # directory in that order.
+    def sortedPrefixes(self):
+        if None == self.ranks:
+            order = range(len(self.prefixes))
+            order.sort(key=self.prefixes.__getitem__)
+            self.order = [ self.prefixes[d] for d in order ]
+            self.ranks = array.array('I', [ 0 ]) * len(order)
+            for rank in xrange(len(order)):
+                self.ranks[order[rank]] = rank
+        return self.order, self.ranks
+
+    # Groups the files of section by directory. Returns (prefix, indices)
+    # for every directory with files of the section, sorted by prefix.
+    def groupFiles(self, section):
+        prefixes, ranks = self.sortedPrefixes()
+        dirs = section.dirs
+        groups = { }
+        for i in xrange(len(dirs)):
+            rank = ranks[dirs[i]]
+            group = groups.get(rank)
+            if None == group:
+                groups[rank] = [ i ]
+            else:
+                group.append(i)
+        order = groups.keys()
+        order.sort()
+        return [ (prefixes[rank], groups[rank]) for rank in order ]
+
+    def items(self, ext):
+        section = self.sections.get(ext)
+        if None == section:
+            return
+        if None == self.scan_stats:
+            groups = self.groupFiles(section)
+        else:
+            started = time.time()
+            groups = self.groupFiles(section)
+            self.scan_stats.addTime('sort', time.time() - started)
+        sizes = section.sizes
+        number = int
+        if 'd' != sizes.typecode:
+            number = None
+
+        # Every directory on the stack is a parent of the directory
+        # visited and still has files whose names sort after it. Files
+        # of deeper directories always come first.
+        stack = [ ]
+        for prefix, indices in groups:
+            while stack:
+                parent, files, pos = stack[-1]
+                if not prefix.startswith(parent):
+                    stack.pop()
+                    for name, size in files[pos:]:
+                        yield parent + name, size
+                    continue
+                rest = prefix[len(parent):]
+                while pos < len(files) and files[pos][0] < rest:
+                    yield parent + files[pos][0], files[pos][1]
+                    pos = pos + 1
+                stack[-1][2] = pos
+                break
+            files = [ ]
+            for i in indices:
+                size = sizes[i]
+                if None != number:
+                    size = number(size)
+                files.append((section.name(i), size))
+            files.sort()
+            stack.append([ prefix, files, 0 ])
+        while stack:
+            parent, files, pos = stack.pop()
+            for name, size in files[pos:]:
+                yield parent + name, size
+
+#####################################################################
+
+# Keeps the found files in sorted runs on disk instead of in memory. At
+# most limit files are held in memory; once the limit is reached they are
+# sorted and written to a temporary file. If too many runs pile up, the
+# oldest ones are merged into a single run. records() yields all files
+# sorted by extension and name, just like the in-memory report. The
+# number and total size of the files of every extension are kept in
+# memory, so the totals of a section are known before it is read. The
+# time spent sorting is counted by scan_stats if given.
+class SpillFiles(object):
+    MAX_RUNS = 64
+
+    def __init__(self, limit, scan_stats = None):
+        self.limit = limit
+        self.scan_stats = scan_stats
+        self.buffer = [ ]
+        self.runs = [ ]
+        self.counts = { }
+        self.sizes = { }
+
+    def add(self, ext, fullname, size):
+        self.buffer.append((ext, fullname, size))
+        self.counts[ext] = self.counts.get(ext, 0) + 1
+        self.sizes[ext] = self.sizes.get(ext, 0) + size
+        if len(self.buffer) >= self.limit:
+            self.spill()
+
+    def spill(self):
+        sortBuffer(self.buffer, self.scan_stats)
+        self.runs.append(self.writeRun(self.buffer))
+        self.buffer = [ ]
+        if len(self.runs) > self.MAX_RUNS:
+            self.compact()
+
+    def compact(self):
+        runs = self.runs[:self.MAX_RUNS]
+        self.runs = [ self.writeRun(heapq.merge(*[ self.readRun(f) \
+                for f in runs ])) ] + self.runs[self.MAX_RUNS:]
+        for f in runs:
+            f.close()
+
+    def absorb(self, other):
+        for ext, fullname, size in other.buffer:
+            self.buffer.append((ext, fullname, size))
+            if len(self.buffer) >= self.limit:
+                self.spill()
+        self.runs.extend(other.runs)
+        for ext in other.counts:
+            self.counts[ext] = self.counts.get(ext, 0) + other.counts[ext]
+            self.sizes[ext] = self.sizes.get(ext, 0) + other.sizes[ext]
+        if len(self.runs) > self.MAX_RUNS:
+            self.compact()
+
+    def writeRun(self, records):
+        f = tempfile.TemporaryFile(prefix='dir-stats-')
+        for record in records:
+            marshal.dump(record, f)
+        f.seek(0)
+        return f
+
+    def readRun(self, f):
+        while True:
+            try:
+                yield marshal.load(f)
+            except EOFError:
+                break
+
+    def records(self):
+        sortBuffer(self.buffer, self.scan_stats)
+        return heapq.merge(self.buffer, *[ self.readRun(f) \
+                for f in self.runs ])
+
+    def close(self):
+        for f in self.runs:
+            f.close()
+        self.runs = [ ]
+        self.buffer = [ ]
+
+#####################################################################
+
+# Keeps only the limit largest files, using a heap of (size, fullname,
+# ext) with the smallest file on top. Ties are broken by the name, so
+# the result does not depend on the order the files are found in.
+class TopFiles(object):
+    def __init__(self, limit):
+        self.limit = limit
+        self.heap = [ ]
+
+    def add(self, ext, fullname, size, allocated = 0):
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, (size, fullname, ext, allocated))
+        elif (size, fullname) > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, (size, fullname, ext, allocated))
+
+    def absorb(self, other):
+        for size, fullname, ext, allocated in other.heap:
+            self.add(ext, fullname, size, allocated)
+
+    # Returns the files kept as a CompactFiles. The allocated sizes are
+    # only summed up here, as only the files still kept are reported.
+    def files(self, options):
+        files = CompactFiles(options.scan_stats)
+        for size, fullname, ext, allocated in self.heap:
+            files.add(ext, fullname, size)
+            if None != options.allocated_sizes:
+                options.allocated_sizes.add(ext, allocated)
+        return files
+
+#####################################################################
+
+def sortBuffer(buffer, scan_stats = None):
+    if None == scan_stats:
+        buffer.sort()
+        return
+    started = time.time()
+    buffer.sort()
+    scan_stats.addTime('sort', time.time() - started)
+
+#####################################################################
+
+def newStore(memory, options):
+    if 0 < options.top_files:
+        return TopFiles(options.top_files)
+    if 0 < memory:
+        return SpillFiles(memory, options.scan_stats)
+    return CompactFiles(options.scan_stats)
+
+#####################################################################
+
+# Stats a single file if its extension matches the list of extensions.
+# Returns (ext, size, allocated size, mtime, atime) or None if the file
+# does not match or could not be stat'ed.
+def matchFile(fullname, filename, entry, extensions, allfiles, options):
+    ext = fileExtension(filename)
+    if 0 == allfiles and not ext in extensions:
+        return None
+    sizes = statFile(fullname, entry, options)
+    if None == sizes:
+        return None
+    return (ext, ) + sizes
+
+#####################################################################
+
+# Returns the size, the allocated size, the mtime and the atime of the
+# file, or None if stat()ing it fails, the file is filtered out by its
+# size or age, or it is another link to an inode that was already
+# counted. The allocated size is only determined for "-u".
+def statFile(fullname, entry, options):
+    try:
+        st = fileStat(fullname, entry, options)
+    except OSError:
+        sys.stderr.write('Error stat\'ing <' + fullname \
+            + '>' + "\r\n")
+        return None
+    if None != options.walk_filter \
+            and not options.walk_filter.accepts(st):
+        return None
+    if None != options.seen_inodes \
+            and not options.seen_inodes.first(st):
+        return None
+    if None == options.allocated_sizes:
+        return st.st_size, 0, st.st_mtime, st.st_atime
+    return st.st_size, allocatedSize(st), st.st_mtime, st.st_atime
+
+#####################################################################
+
+# files is either a CompactFiles, a SpillFiles or a TopFiles object.
+# The size distribution and the ages cover all files found, even those
+# a TopFiles object drops later on. The files of cached directories come
+# without times and are left out of the ages.
+def storeFile(files, options, ext, fullname, size, allocated = 0,
+        mtime = None, atime = None):
+    if None != options.scan_stats:
+        options.scan_stats.addFile(size)
+    if None != options.size_distribution:
+        options.size_distribution.add(ext, fullname, size)
+    if None != options.file_ages and None != mtime:
+        options.file_ages.add(ext, fullname, size, mtime, atime)
+    if isinstance(files, TopFiles):
+        files.add(ext, fullname, size, allocated)
+        return
+    if None != options.allocated_sizes:
+        options.allocated_sizes.add(ext, allocated)
+    files.add(ext, fullname, size)
+
+#####################################################################
+
+def addFile(files, fullname, filename, entry, extensions, allfiles,
+        options):
+    found = matchFile(fullname, filename, entry, extensions, allfiles,
+            options)
+    if None != found:
+        storeFile(files, options, found[0], fullname, found[1], found[2],
+                found[3], found[4])
+
+#####################################################################
+
+def scanTree(basedir, extensions, allfiles, options, memory = 0):
+    files = newStore(memory, options)
+    for fullname, filename, entry in walkTree(basedir, options):
+        addFile(files, fullname, filename, entry, extensions, allfiles,
+                options)
+    return files
+
+#####################################################################
+
+# Every worker takes a directory from the shared queue, puts its
+# subdirectories back into the queue and stats the matching files. Idle
+# workers pick up whatever directory is queued next, so a single deep
+# subtree is spread over all workers. The results of each worker are
+# kept separately and merged after the walk. An exception is added to
+# errors as sys.exc_info(); from then on all workers only drain the
+# queue, so scanTreeParallel() can raise it once the queue is empty.
+def scanWorker(pending, extensions, allfiles, options, memory, results,
+        errors, lock):
+    files = newStore(memory, options)
+    while True:
+        root = pending.get()
+        if None == root:
+            pending.task_done()
+            break
+        try:
+            if errors:
+                continue
+            subdirs, filelist = listDir(root, options)
+            for subdir in subdirs:
+                pending.put(subdir)
+            for fullname, filename, entry in filelist:
+                addFile(files, fullname, filename, entry, extensions,
+                        allfiles, options)
+        except:
+            lock.acquire()
+            try:
+                errors.append(sys.exc_info())
+            finally:
+                lock.release()
+        finally:
+            pending.task_done()
+    lock.acquire()
+    try:
+        results.append(files)
+    finally:
+        lock.release()
+
+#####################################################################
+
+def scanTreeParallel(basedir, extensions, allfiles, jobs, options,
+        memory = 0):
+    pending = Queue.Queue()
+    results = [ ]
+    errors = [ ]
+    lock = threading.Lock()
+    workers = [ ]
+    if 0 < memory:
+        memory = max(1, memory / jobs)
+    pending.put(basedir)
+    for i in range(jobs):
+        worker = threading.Thread(target=scanWorker, args=(pending,
+                extensions, allfiles, options, memory, results, errors,
+                lock))
+        worker.setDaemon(True)
+        worker.start()
+        workers.append(worker)
+    pending.join()
+    for worker in workers:
+        pending.put(None)
+    for worker in workers:
+        worker.join()
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+
+    files = newStore(memory, options)
+    for result in results:
+        files.absorb(result)
+    return files
+
+#####################################################################
+
+# Runs the listings and stats handed out by scanTreeAsync() and reports
+# every result back through the done queue. A directory that fails while
+# it is listed is reported with an empty listing. Any other exception is
+# reported as (None, sys.exc_info()), so scanTreeAsync() can raise it
+# instead of waiting for a result that never comes.
+def asyncWorker(tasks, done, options):
+    while True:
+        task = tasks.get()
+        if None == task:
+            break
+        try:
+            if 'stat' == task[0]:
+                result = statFile(task[1], task[2], options)
+            else:
+                try:
+                    result = listDir(task[1], options)
+                except OSError:
+                    result = ([ ], [ ])
+        except:
+            done.put((None, sys.exc_info()))
+            continue
+        done.put((task, result))
+
+#####################################################################
+
+# Keeps up to inflight directory listings and stats running at once, so
+# the round trips of a high latency filesystem overlap. Unlike "-j" the
+# files of a single large directory are stat'ed concurrently as well.
+# The workers only do the I/O; the listings are expanded and the files
+# stored here, in a single thread. Pending stats are handed out before
+# pending listings, which keeps the list of known but unstat'ed files
+# short.
+def scanTreeAsync(basedir, extensions, allfiles, inflight, options,
+        memory = 0):
+    files = newStore(memory, options)
+    tasks = Queue.Queue()
+    done = Queue.Queue()
+    workers = [ ]
+    for i in range(inflight):
+        worker = threading.Thread(target=asyncWorker, args=(tasks, done,
+                options))
+        worker.setDaemon(True)
+        worker.start()
+        workers.append(worker)
+
+    dirs = [ basedir ]
+    stats = [ ]
+    running = 0
+    try:
+        while dirs or stats or 0 < running:
+            while running < inflight and (dirs or stats):
+                if stats:
+                    tasks.put(stats.pop())
+                else:
+                    tasks.put(('list', dirs.pop()))
+                running = running + 1
+            task, result = done.get()
+            running = running - 1
+            if None == task:
+                raise result[0], result[1], result[2]
+            if 'list' == task[0]:
+                subdirs, filelist = result
+                dirs.extend(subdirs)
+                for fullname, filename, entry in filelist:
+                    ext = fileExtension(filename)
+                    if 1 == allfiles or ext in extensions:
+                        stats.append(('stat', fullname, entry, ext))
+            elif None != result:
+                storeFile(files, options, task[3], task[1], result[0],
+                        result[1], result[2], result[3])
+    finally:
+        for worker in workers:
+            tasks.put(None)
+        for worker in workers:
+            worker.join()
+    return files
+
+#####################################################################
+
+# Caches the matching files of every directory along with the mtime of
+# the directory. A directory whose mtime did not change since the last
+# run is not listed again; its files and subdirectories are taken from
+# the cache. Subdirectories are always checked, as their mtime is not
+# reflected in the mtime of the parent.
+# A file that is modified in place does not change the mtime of its
+# directory. Such changes are only noticed once the cached directory is
+# older than maxage seconds (0 keeps entries forever). The cache is
+# cleared whenever the list of extensions changes. Once the database has
+# grown to maxsize bytes, no further directories are added; they are
+# simply listed on every run. Directories that were not visited during a
+# run are removed from the cache by finish(), which must only be called
+# once the scan is complete. close() keeps them, so an interrupted run
+# does not throw away the directories it did not reach.
+class ScanCache(object):
+    FORMAT = '1'
+
+    def __init__(self, filename, extensions, allfiles, maxsize, maxage,
+            filters = ''):
+        self.maxsize = maxsize
+        self.maxage = maxage
+        self.full = 0
+        self.stored = 0
+        self.now = time.time()
+        if 1 == allfiles:
+            key = self.FORMAT + ':*'
+        else:
+            exts = list(set(extensions))
+            exts.sort()
+            key = self.FORMAT + ':' + '/'.join(exts)
+        if '' != filters:
+            key = key + ':' + filters
+
+        self.db = sqlite3.connect(filename)
+        self.db.text_factory = str
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT ' \
+                + 'PRIMARY KEY, value TEXT)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS dirs (path TEXT ' \
+                + 'PRIMARY KEY, mtime REAL, scanned REAL, run INTEGER, ' \
+                + 'subdirs TEXT)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS files (dir TEXT, ' \
+                + 'name TEXT, size INTEGER)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS files_dir ON ' \
+                + 'files (dir)')
+
+        meta = dict(self.db.execute('SELECT name, value FROM meta'))
+        if key != meta.get('key'):
+            self.db.execute('DELETE FROM files')
+            self.db.execute('DELETE FROM dirs')
+            meta['run'] = '0'
+        self.run = int(meta.get('run', '0')) + 1
+        self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                ('key', key))
+        self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                ('run', str(self.run)))
+
+    # Returns (subdirs, files) of root with files being a list of
+    # (filename, size), or None if root has to be listed again.
+    def lookup(self, root, mtime):
+        row = self.db.execute('SELECT mtime, scanned, subdirs FROM dirs ' \
+                + 'WHERE path = ?', (root, )).fetchone()
+        if None == row:
+            return None
+        if mtime != row[0]:
+            return None
+        if 0 < self.maxage and self.now - row[1] > self.maxage:
+            return None
+        self.db.execute('UPDATE dirs SET run = ? WHERE path = ?',
+                (self.run, root))
+        subdirs = [ ]
+        if '' != row[2]:
+            subdirs = row[2].split('\0')
+        files = self.db.execute('SELECT name, size FROM files WHERE ' \
+                + 'dir = ?', (root, )).fetchall()
+        return subdirs, files
+
+    def store(self, root, mtime, subdirs, files):
+        self.db.execute('DELETE FROM files WHERE dir = ?', (root, ))
+        if 1 == self.full:
+            self.db.execute('DELETE FROM dirs WHERE path = ?', (root, ))
+            return
+        self.db.execute('INSERT OR REPLACE INTO dirs VALUES ' \
+                + '(?, ?, ?, ?, ?)', (root, mtime, self.now, self.run,
+                '\0'.join(subdirs)))
+        self.db.executemany('INSERT INTO files VALUES (?, ?, ?)',
+                [ (root, name, size) for name, size in files ])
+        self.stored = self.stored + 1
+        if 0 == self.stored % 1000 and self.size() >= self.maxsize:
+            self.full = 1
+
+    def size(self):
+        pages = self.db.execute('PRAGMA page_count').fetchone()[0]
+        pagesize = self.db.execute('PRAGMA page_size').fetchone()[0]
+        return pages * pagesize
+
+    def finish(self):
+        self.db.execute('DELETE FROM files WHERE dir IN (SELECT path ' \
+                + 'FROM dirs WHERE run != ?)', (self.run, ))
+        self.db.execute('DELETE FROM dirs WHERE run != ?', (self.run, ))
+        self.close()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+#####################################################################
+
+def scanTreeCached(basedir, extensions, allfiles, memory, cache,
+        options):
+    files = newStore(memory, options)
+    pending = [ basedir ]
+    while pending:
+        root = pending.pop()
+        try:
+            mtime = os.stat(root).st_mtime
+        except OSError:
+            continue
+        cached = cache.lookup(root, mtime)
+        if None != cached:
+            if None != options.scan_stats:
+                options.scan_stats.addDir(root, 0.0)
+            subdirs, filelist = cached
+            for filename, size in filelist:
+                storeFile(files, options, fileExtension(filename),
+                        os.path.join(root, filename), size)
+        else:
+            subdirs = [ ]
+            filelist = [ ]
+            subpaths, entries = listDir(root, options)
+            for subpath in subpaths:
+                subdirs.append(os.path.basename(subpath))
+            for fullname, filename, entry in entries:
+                found = matchFile(fullname, filename, entry, extensions,
+                        allfiles, options)
+                if None != found:
+                    storeFile(files, options, found[0], fullname,
+                            found[1])
+                    filelist.append((filename, found[1]))
+            cache.store(root, mtime, subdirs, filelist)
+        for subdir in subdirs:
+            pending.append(os.path.join(root, subdir))
+    return files
+
+#####################################################################
+
+# Yields the files of the extension ext from the merged records. pending
+# holds the next record; records of smaller extensions are skipped.
+def spilledItems(records, ext, pending):
+    while None != pending[0] and ext >= pending[0][0]:
+        if ext == pending[0][0]:
+            yield pending[0][1], pending[0][2]
+        try:
+            pending[0] = records.next()
+        except StopIteration:
+            pending[0] = None
+
+#####################################################################
+
+# Lowers the extensions and tells whether '*', meaning all files, is one
+# of them.
+def extensionList(extensions):
+    exts = [ ext.lower() for ext in extensions ]
+    if '*' in exts:
+        return exts, 1
+    return exts, 0
+
+#####################################################################
+
+# The files found by a scan, read like a BinaryReader or an IniReader.
+# There is a section for every extension searched for and for every
+# extension found; items() yields (fullname, size) sorted by fullname.
+# The sections of a scan spilled to disk are merged from the sorted runs
+# on the fly, so they have to be read in sorted order. allocated holds
+# the allocated size of every section if the options of the scan had
+# allocated_sizes set, distribution and ages hold their
+# size_distribution and file_ages.
+class ScanReport(object):
+    def __init__(self, files, extensions, allfiles, header = '',
+            options = None):
+        if None == options:
+            options = ScanOptions()
+        if isinstance(files, TopFiles):
+            files = files.files(options)
+        self.files = files
+        self.header = header
+        self.allocated = None
+        if None != options.allocated_sizes:
+            self.allocated = options.allocated_sizes.totals
+        self.distribution = options.size_distribution
+        self.ages = options.file_ages
+        if isinstance(files, SpillFiles):
+            exts = set(files.counts.keys())
+        else:
+            exts = set(files.exts())
+        if 0 == allfiles:
+            exts.update(extensions)
+        self.names = list(exts)
+        self.names.sort()
+        self.records = None
+        self.pending = [ None ]
+
+    def sectionNames(self):
+        return list(self.names)
+
+    def totals(self, name):
+        if isinstance(self.files, SpillFiles):
+            return self.files.counts.get(name, 0), \
+                    self.files.sizes.get(name, 0)
+        return self.files.totals(name)
+
+    def items(self, name):
+        if not isinstance(self.files, SpillFiles):
+            return self.files.items(name)
+        if None == self.records:
+            self.records = self.files.records()
+            try:
+                self.pending = [ self.records.next() ]
+            except StopIteration:
+                self.pending = [ None ]
+        return spilledItems(self.records, name, self.pending)
+
+    def close(self):
+        if isinstance(self.files, SpillFiles):
+            self.files.close()
+
+#####################################################################
+
+# Scans the tree below basedir for files with one of the extensions and
+# returns a ScanReport. The tree is scanned with the cache if one is
+# given, with inflight concurrent listings and stats, or with jobs
+# threads. With memory set, at most memory files are kept in memory. The
+# cache is closed once the scan is done. options is a ScanOptions with
+# the optional parts of the scan, or None for a plain scan.
+def scanReport(basedir, extensions, jobs = 1, memory = 0, cache = None,
+        inflight = 0, header = '', options = None):
+    extensions, allfiles = extensionList(extensions)
+    if None == options:
+        options = ScanOptions()
+    if None != cache:
+        try:
+            files = scanTreeCached(basedir, extensions, allfiles, memory,
+                    cache, options)
+        except:
+            cache.close()
+            raise
+        cache.finish()
+    elif 0 < inflight:
+        files = scanTreeAsync(basedir, extensions, allfiles, inflight,
+                options, memory)
+    elif 1 < jobs:
+        files = scanTreeParallel(basedir, extensions, allfiles, jobs,
+                options, memory)
+    else:
+        files = scanTree(basedir, extensions, allfiles, options, memory)
+    return ScanReport(files, extensions, allfiles, header, options)
+
+#####################################################################
+
+# Yields a FileRecord for every file below basedir with one of the
+# extensions, in the order the files are found. Nothing is kept in
+# memory, so top_files of options does not apply.
+def scanFiles(basedir, extensions, options = None):
+    extensions, allfiles = extensionList(extensions)
+    if None == options:
+        options = ScanOptions()
+    for fullname, filename, entry in walkTree(basedir, options):
+        found = matchFile(fullname, filename, entry, extensions,
+                allfiles, options)
+        if None == found:
+            continue
+        if None != options.scan_stats:
+            options.scan_stats.addFile(found[1])
+        if None != options.allocated_sizes:
+            options.allocated_sizes.add(found[0], found[2])
+        if None != options.size_distribution:
+            options.size_distribution.add(found[0], fullname, found[1])
+        if None != options.file_ages:
+            options.file_ages.add(found[0], fullname, found[1],
+                    found[3], found[4])
+        yield FileRecord(fullname, found[1], found[0])
@@ -0,0 +1,164 @@
+# vim: set sw=4 sts=4 ts=8 et ft=python fenc=utf8 ff=unix tw=74 :
+
+#
+# SYNOPSIS
+# ========
+# Summing up the files of a report per directory, the engine behind
+# dir-stats-summary.py.
+#
+# HOW IT WORKS
+# ============
+# summarizeItems() turns the (path, size) entries of a report into a
+# summary, a dictionary of directories and the total size of the files
+# directly within them. rollup() turns these sizes into recursive sizes
+# including all subdirectories, largestDirs() keeps the largest
+# directories only. summaryReport() wraps a summary into a report that
+# can be handed to the renderers.
+#
+
+import heapq
+import os.path
+
+from dirstats.report import MemoryReport
+
+#####################################################################
+
+# Sums up the sizes of the files in every directory. items yields
+# (path, size) or records with the path and the size first, like
+# scan.FileRecord.
+def summarizeItems(items, summary = None):
+    if None == summary:
+        summary = { }
+    dirname = os.path.dirname
+    for item in items:
+        basedir = dirname(item[0])
+        summary[basedir] = summary.get(basedir, 0) + item[1]
+    return summary
+
+#####################################################################
+
+# Adds the sizes of summary to those of merged.
+def mergeSummary(merged, summary):
+    for dir in summary:
+        merged[dir] = merged.get(dir, 0) + summary[dir]
+    return merged
+
+#####################################################################
+
+# Returns the top largest directories of summary that reach the limit.
+# heapq.nlargest() only keeps top directories at a time. A top of 0
+# keeps all directories.
+def largestDirs(summary, top, limit = 0):
+    if 0 == top:
+        return summary
+    candidates = ((size, dir) for dir, size in summary.iteritems() \
+            if size >= limit)
+    result = { }
+    for size, dir in heapq.nlargest(top, candidates):
+        result[dir] = size
+    return result
+
+#####################################################################
+
+def dirDepth(dir):
+    depth = 0
+    for part in dir.split(os.sep):
+        if '' != part:
+            depth = depth + 1
+    return depth
+
+#####################################################################
+
+# Adds the size of every directory to all of its ancestors. The
+# directories are processed from the deepest level upwards, so every
+# directory adds its total to its parent exactly once. Returns the
+# recursive totals, the subdirectories of every directory and the
+# topmost directories.
+def rollupTotals(summary):
+    totals = dict(summary)
+    children = { }
+    levels = { }
+    for dir in summary:
+        levels.setdefault(dirDepth(dir), [ ]).append(dir)
+    if 0 == len(levels):
+        return totals, children, [ ]
+
+    depth = max(levels.keys())
+    while 0 < depth:
+        for dir in levels.get(depth, [ ]):
+            parent = os.path.dirname(dir)
+            if parent == dir:
+                continue
+            if not totals.has_key(parent):
+                totals[parent] = 0
+                levels.setdefault(depth - 1, [ ]).append(parent)
+            children.setdefault(parent, [ ]).append(dir)
+            totals[parent] = totals[parent] + totals[dir]
+        depth = depth - 1
+    return totals, children, levels.get(0, [ ])
+
+#####################################################################
+
+# Turns the sizes of the directories in summary into recursive sizes,
+# including all subdirectories. Returns the directories to report along
+# with the total size of the tree.
+# The report starts at the deepest directory that contains all files.
+# Directories below that one are only reported down to maxdepth levels,
+# and only the children largest subdirectories of every directory are
+# reported. Directories below limit are not descended into. A maxdepth
+# below 0 and children of 0 mean no limit.
+def rollup(summary, limit = 0, maxdepth = -1, children = 0):
+    totals, subdirs_of, roots = rollupTotals(summary)
+
+    pending = [ ]
+    total_size = 0
+    for root in roots:
+        while 1 == len(subdirs_of.get(root, [ ])) \
+                and not summary.has_key(root):
+            root = subdirs_of[root][0]
+        pending.append((root, 0))
+        total_size = total_size + totals[root]
+
+    result = { }
+    while pending:
+        dir, depth = pending.pop()
+        if totals[dir] < limit:
+            continue
+        result[dir] = totals[dir]
+        if 0 <= maxdepth and depth >= maxdepth:
+            continue
+        subdirs = subdirs_of.get(dir, [ ])
+        if 0 < children:
+            subdirs.sort(key=lambda d: totals[d], reverse=True)
+            subdirs = subdirs[:children]
+        for subdir in subdirs:
+            pending.append((subdir, depth + 1))
+    return result, total_size
+
+#####################################################################
+
+# Selects the directories of summary to report: all directories that
+# reach the limit, with recursive sizes if recursive is set, and only
+# the top largest ones if top is not 0. Returns the directories along
+# with the total size, which is the size of the whole tree for recursive
+# sizes and the size of the selected directories otherwise.
+def selectDirs(summary, limit, recursive = 0, maxdepth = -1,
+        children = 0, top = 0):
+    total_size = 0
+    if 1 == recursive:
+        summary, total_size = rollup(summary, limit, maxdepth, children)
+    summary = largestDirs(summary, top, limit)
+    result = { }
+    for dir in summary:
+        if summary[dir] >= limit:
+            result[dir] = summary[dir]
+            if 0 == recursive:
+                total_size = total_size + summary[dir]
+    return result, total_size
+
+#####################################################################
+
+# Returns a report with the single section name listing the directories
+# of summary.
+def summaryReport(summary, name, header = ''):
+    return MemoryReport({ name: summary }, header)